@@ -0,0 +1,108 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SOCKET_SUFFIX = ".sock"
+
+
+class _BusProtocol(asyncio.DatagramProtocol):
+    def __init__(self, bus: "CacheBus"):
+        self.bus = bus
+
+    def datagram_received(self, data, addr):
+        try:
+            message = json.loads(data)
+        except ValueError:
+            logger.error("Cache bus: dropped malformed message")
+            return
+        self.bus.dispatch(message)
+
+
+class CacheBus:
+    """Broadcasts cache invalidations between worker processes on one host.
+
+    Every worker binds a Unix datagram socket in a shared directory and
+    publishing sends the message to every other socket found there. Without
+    a directory (single-process mode) publishing only runs local handlers.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.pid = os.getpid()
+        self._handlers: Dict[str, List[Callable[[], None]]] = {}
+        self._sock: Optional[socket.socket] = None
+        self._transport = None
+
+    @property
+    def path(self) -> Optional[str]:
+        if not self.directory:
+            return None
+        return os.path.join(self.directory, f"{self.pid}{SOCKET_SUFFIX}")
+
+    def subscribe(self, topic: str, handler: Callable[[], None]):
+        self._handlers.setdefault(topic, []).append(handler)
+
+    async def start(self):
+        if not self.directory:
+            return
+        # The pid is only known once the worker has been forked
+        self.pid = os.getpid()
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self.path)
+        self._sock.setblocking(False)
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _BusProtocol(self), sock=self._sock
+        )
+        logger.info(f"Cache bus listening on {self.path}")
+
+    async def stop(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def dispatch(self, message: dict):
+        """Run handlers for a message received from another worker"""
+        if message.get("origin") == self.pid:
+            return
+        for topic in message.get("topics", []):
+            for handler in self._handlers.get(topic, []):
+                try:
+                    handler()
+                except Exception as e:
+                    logger.error(f"Cache bus handler for {topic} failed: {str(e)}")
+
+    def publish(self, *topics: str):
+        """Tell every other worker to invalidate the given caches"""
+        if not self.directory or self._transport is None:
+            return
+
+        payload = json.dumps({"origin": self.pid, "topics": list(topics)}).encode()
+        for name in os.listdir(self.directory):
+            if not name.endswith(SOCKET_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            if path == self.path:
+                continue
+            try:
+                self._sock.sendto(payload, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker exited without cleaning up; drop its socket
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            except BlockingIOError:
+                # Receiver's buffer is full; it is busy and will reload on TTL
+                logger.warning(f"Cache bus: {name} is not keeping up, message dropped")
@@ -0,0 +1,190 @@
+import hashlib
+import logging
+import math
+import os
+import time
+from array import array
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Reload the snapshot periodically so writes from other processes are picked up;
+# 0 reloads it on every upload
+CATALOG_TTL_SECONDS = float(os.getenv("WMS_CATALOG_TTL_SECONDS", "300"))
+CREATE_CHUNK_SIZE = 5000
+# Updates are one statement per product, so keep each batch transaction smaller
+UPDATE_CHUNK_SIZE = 1000
+# Reloads to try when invalidations keep arriving mid-load
+LOAD_ATTEMPTS = 3
+
+
+def name_hash(name: str) -> int:
+    """Stable 64-bit hash of a product name"""
+    return int.from_bytes(
+        hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "little", signed=True
+    )
+
+
+def _price(value: Optional[float]) -> float:
+    # NaN marks a NULL price/cost
+    return float("nan") if value is None else float(value)
+
+
+def _same(stored: float, value: float) -> bool:
+    return stored == value or (math.isnan(stored) and math.isnan(value))
+
+
+class ProductCatalog:
+    """Compact in-process snapshot of products keyed by SKU.
+
+    Rows live in parallel arrays (ids, name hashes, prices, costs) with a
+    single dict from SKU to row index, which keeps a large catalog to a few
+    dozen bytes per product beyond the key and id strings.
+
+    The snapshot is trusted until it is invalidated or the TTL expires.
+    Writes made through this API reach every worker over the cache bus, but
+    a change made elsewhere (another deployment, manual SQL) or a dropped
+    bus message is only seen after the next reload. Until then an upload
+    whose values match the stale snapshot is treated as unchanged and not
+    written. Lower WMS_CATALOG_TTL_SECONDS (0 disables the snapshot) when
+    products are edited outside the API.
+    """
+
+    def __init__(self, ttl: float = CATALOG_TTL_SECONDS):
+        self.ttl = ttl
+        self._index: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._name_hashes = array("q")
+        self._prices = array("d")
+        self._costs = array("d")
+        self._loaded_at: Optional[float] = None
+        # Bumped by invalidate() so a load that was already running is not trusted
+        self._generation = 0
+
+    def __len__(self):
+        return len(self._ids)
+
+    @property
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def invalidate(self):
+        self._generation += 1
+        self._loaded_at = None
+
+    def clear(self):
+        self._index.clear()
+        self._ids.clear()
+        self._name_hashes = array("q")
+        self._prices = array("d")
+        self._costs = array("d")
+
+    async def load(self, storage) -> bool:
+        """Rebuild the snapshot from the products table; False if invalidated meanwhile"""
+        generation = self._generation
+        rows = await storage.catalog_rows()
+        self.clear()
+        for row in rows:
+            self.put(row["sku"], row["id"], row["name"], row["price"], row["cost"])
+        if generation != self._generation:
+            # Invalidated while the query ran: the rows may predate the change
+            logger.info("Product catalog changed during reload; will reload again")
+            return False
+        self._loaded_at = time.monotonic()
+        logger.info(f"Loaded product catalog snapshot: {len(self)} products")
+        return True
+
+    async def ensure_loaded(self, storage) -> bool:
+        """Reload if stale; False if no reload survived a concurrent invalidation"""
+        for _ in range(LOAD_ATTEMPTS):
+            if not self.is_stale:
+                return True
+            if await self.load(storage):
+                return True
+        return False
+
+    def get_id(self, sku: str) -> Optional[str]:
+        i = self._index.get(sku)
+        return None if i is None else self._ids[i]
+
+    def put(self, sku: str, product_id: str, name: str, price: Optional[float], cost: Optional[float]):
+        """Insert or overwrite a single product in the snapshot"""
+        i = self._index.get(sku)
+        if i is None:
+            self._index[sku] = len(self._ids)
+            self._ids.append(product_id)
+            self._name_hashes.append(name_hash(name or ""))
+            self._prices.append(_price(price))
+            self._costs.append(_price(cost))
+        else:
+            self._ids[i] = product_id
+            self._name_hashes[i] = name_hash(name or "")
+            self._prices[i] = _price(price)
+            self._costs[i] = _price(cost)
+
+    def is_unchanged(self, sku: str, name: str, price: float, cost: float) -> bool:
+        i = self._index[sku]
+        return (
+            self._name_hashes[i] == name_hash(name)
+            and _same(self._prices[i], _price(price))
+            and _same(self._costs[i], _price(cost))
+        )
+
+    async def sync(self, storage, products: Dict[str, dict], update_existing: bool = True) -> Dict[str, str]:
+        """Write only new or changed products and return a sku -> product_id map.
+
+        `products` maps each SKU in an upload to the create payload
+        (sku, name, category, price, cost). Unchanged products are resolved
+        from the snapshot without touching the database. With
+        `update_existing=False` known SKUs are never rewritten, only resolved.
+        """
+        # A snapshot invalidated during every reload can't prove anything unchanged
+        trusted = await self.ensure_loaded(storage)
+
+        product_ids: Dict[str, str] = {}
+        new_products = []
+        changed_products = []
+
+        for sku, product in products.items():
+            if sku not in self._index:
+                new_products.append(product)
+            elif not update_existing or (
+                trusted and self.is_unchanged(sku, product["name"], product["price"], product["cost"])
+            ):
+                product_ids[sku] = self.get_id(sku)
+            else:
+                changed_products.append(product)
+
+        try:
+            await self._write(storage, new_products, changed_products, product_ids)
+        except Exception:
+            # The snapshot may no longer match the table; rebuild it next time
+            self.invalidate()
+            raise
+
+        logger.info(
+            f"Catalog sync: {len(new_products)} new, {len(changed_products)} changed, "
+            f"{len(products) - len(new_products) - len(changed_products)} unchanged"
+        )
+        return product_ids
+
+    async def _write(self, storage, new_products: List[dict], changed_products: List[dict],
+                     product_ids: Dict[str, str]):
+        if new_products:
+            for i in range(0, len(new_products), CREATE_CHUNK_SIZE):
+                await storage.create_products(new_products[i:i + CREATE_CHUNK_SIZE])
+            # Skipped duplicates were created elsewhere; their current values are
+            # what the snapshot should hold, so read back rather than assume
+            created = await storage.find_products_by_sku([p["sku"] for p in new_products])
+            for product in created:
+                self.put(product["sku"], product["id"], product["name"], product["price"], product["cost"])
+                product_ids[product["sku"]] = product["id"]
+
+        for i in range(0, len(changed_products), UPDATE_CHUNK_SIZE):
+            chunk = changed_products[i:i + UPDATE_CHUNK_SIZE]
+            await storage.update_products(chunk)
+            for product in chunk:
+                sku = product["sku"]
+                self.put(sku, self.get_id(sku), product["name"], product["price"], product["cost"])
+                product_ids[sku] = self.get_id(sku)
+
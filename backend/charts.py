@@ -0,0 +1,171 @@
+import logging
+from numbers import Number
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CHART_TYPES = ("bar", "line", "area")
+DEFAULT_MAX_POINTS = 500
+MIN_POINTS = 3
+OTHER_LABEL = "Other"
+
+
+def generate_chart_data(result: dict, chart_type: str, max_points: Optional[int] = None,
+                        label_column: Optional[str] = None,
+                        value_columns: Optional[List[str]] = None):
+    """Generate chart data based on query result"""
+    if chart_type not in CHART_TYPES:
+        return None
+
+    columns = result.get("columns") or []
+    rows = result.get("data") or []
+    if not columns or not rows:
+        return None
+
+    df = pd.DataFrame(rows, columns=columns)
+    label_column, value_columns = pick_columns(df, label_column, value_columns)
+    if not value_columns:
+        return None
+
+    max_points = max(MIN_POINTS, max_points or DEFAULT_MAX_POINTS)
+    total_points = len(df)
+
+    if chart_type in ("line", "area"):
+        df = downsample_lttb(df, label_column, value_columns, max_points)
+    else:
+        df = downsample_top_n(df, label_column, value_columns, max_points)
+
+    return {
+        "type": chart_type,
+        "labels": [_to_json(v) for v in df[label_column]],
+        "datasets": [
+            {
+                "label": column,
+                "data": [_to_json(v) for v in df[column]]
+            }
+            for column in value_columns
+        ],
+        "label_column": label_column,
+        "total_points": total_points,
+        "returned_points": len(df),
+        "downsampled": len(df) < total_points
+    }
+
+
+def pick_columns(df: pd.DataFrame, label_column: Optional[str] = None,
+                 value_columns: Optional[List[str]] = None):
+    """Pick the label column and numeric series columns from a result frame"""
+    numeric = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])
+               and not pd.api.types.is_bool_dtype(df[c])]
+
+    if label_column not in df.columns:
+        # Prefer a date-like or text column for the axis, fall back to the first column
+        non_numeric = [c for c in df.columns if c not in numeric]
+        label_column = non_numeric[0] if non_numeric else df.columns[0]
+
+    if value_columns:
+        value_columns = [c for c in value_columns if c in numeric and c != label_column]
+    else:
+        value_columns = [c for c in numeric if c != label_column]
+
+    return label_column, value_columns
+
+
+def downsample_lttb(df: pd.DataFrame, label_column: str, value_columns: List[str],
+                    max_points: int) -> pd.DataFrame:
+    """Reduce a line series with Largest-Triangle-Three-Buckets, keeping labels aligned"""
+    if len(df) <= max_points:
+        return df
+
+    x = _x_axis(df[label_column])
+    # Split the budget across series and keep the union so every series stays in shape
+    per_series = max(MIN_POINTS, max_points // len(value_columns))
+    keep = set()
+    for column in value_columns:
+        y = df[column].to_numpy(dtype=float)
+        keep.update(lttb_indices(x, np.nan_to_num(y), per_series))
+
+    if len(keep) > max_points:
+        # Too many series for the budget: shape the axis by the first series only
+        y = df[value_columns[0]].to_numpy(dtype=float)
+        keep = lttb_indices(x, np.nan_to_num(y), max_points)
+
+    return df.iloc[sorted(keep)]
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> List[int]:
+    """Return the row indices selected by LTTB for a single series"""
+    n = len(x)
+    if threshold >= n or threshold < MIN_POINTS:
+        return list(range(n))
+
+    selected = [0]
+    bucket_edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    a = 0
+    for i in range(threshold - 2):
+        start, end = bucket_edges[i], bucket_edges[i + 1]
+        next_start = bucket_edges[i + 1]
+        next_end = bucket_edges[i + 2] if i + 2 < len(bucket_edges) else n
+        next_end = max(next_end, next_start + 1)
+
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Triangle area between the last kept point, each candidate and the next bucket's mean
+        bx = x[start:end]
+        by = y[start:end]
+        if len(bx) == 0:
+            continue
+        areas = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+        a = start + int(areas.argmax())
+        selected.append(a)
+
+    selected.append(n - 1)
+    return selected
+
+
+def downsample_top_n(df: pd.DataFrame, label_column: str, value_columns: List[str],
+                     max_points: int) -> pd.DataFrame:
+    """Keep the largest categories and fold the rest into a single "Other" bucket"""
+    grouped = df.groupby(label_column, sort=False, dropna=False)[value_columns].sum().reset_index()
+    if len(grouped) <= max_points:
+        return grouped
+
+    rank_column = value_columns[0]
+    grouped = grouped.sort_values(rank_column, ascending=False, key=lambda s: s.abs())
+    top = grouped.iloc[:max_points - 1]
+    rest = grouped.iloc[max_points - 1:]
+
+    other = {label_column: OTHER_LABEL}
+    other.update({column: rest[column].sum() for column in value_columns})
+    return pd.concat([top, pd.DataFrame([other])], ignore_index=True)
+
+
+def _x_axis(labels: pd.Series) -> np.ndarray:
+    """Numeric x positions for LTTB: real values for numbers and dates, row order otherwise"""
+    if pd.api.types.is_numeric_dtype(labels):
+        return labels.to_numpy(dtype=float)
+
+    dates = pd.to_datetime(labels, errors="coerce")
+    if dates.notna().all():
+        return dates.astype("int64").to_numpy(dtype=float)
+
+    return np.arange(len(labels), dtype=float)
+
+
+def _to_json(value):
+    """Convert numpy/pandas scalars into JSON-friendly values"""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    if isinstance(value, Number) or isinstance(value, str):
+        return value
+    return str(value)
@@ -0,0 +1,34 @@
+import os
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_MAX_DB_CONNECTIONS = 40
+DEFAULT_POOL_TIMEOUT = 10
+MIN_POOL_SIZE = 2
+
+
+def pooled_database_url(url: str, pool_size: Optional[int] = None,
+                        pool_timeout: Optional[int] = None) -> str:
+    """Add Prisma connection pool parameters to a Postgres URL"""
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    if pool_size:
+        query["connection_limit"] = str(pool_size)
+    if pool_timeout is not None:
+        query["pool_timeout"] = str(pool_timeout)
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def worker_pool_size(workers: int, max_connections: int) -> int:
+    """Split the database connection budget evenly across workers"""
+    return max(MIN_POOL_SIZE, max_connections // workers)
+
+
+def worker_database_url() -> Optional[str]:
+    """DATABASE_URL with the pool size serve.py chose for this worker, if any"""
+    url = os.getenv("DATABASE_URL")
+    pool_size = os.getenv("WMS_DB_POOL_SIZE")
+    if not url or not pool_size:
+        return None
+    pool_timeout = int(os.getenv("WMS_DB_POOL_TIMEOUT", DEFAULT_POOL_TIMEOUT))
+    return pooled_database_url(url, int(pool_size), pool_timeout)
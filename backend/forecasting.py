@@ -0,0 +1,271 @@
+import argparse
+import asyncio
+import logging
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from statistics import NormalDist
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Forecast defaults
+DEFAULT_HISTORY_DAYS = 180
+DEFAULT_HORIZON_DAYS = 30
+DEFAULT_LEAD_TIME_DAYS = 7
+DEFAULT_SERVICE_LEVEL = 0.95
+DEFAULT_ALPHA = 0.3
+DEFAULT_WINDOW = 28
+FORECAST_METHODS = ("sma", "ses")
+
+# Below this many SKUs splitting the matrix across threads costs more than it saves
+PARALLEL_MIN_ROWS = 20000
+WRITE_CHUNK_SIZE = 5000
+# The replace runs in one interactive transaction; Prisma's 5s default is far too
+# short for a large catalog, so size the timeout to the number of chunks
+TX_BASE_TIMEOUT_SECONDS = 60
+TX_SECONDS_PER_CHUNK = 2
+TX_MAX_WAIT_SECONDS = 10
+# Postgres advisory lock serializing reorder suggestion writes across workers
+FORECAST_LOCK_ID = 7261001
+
+# One forecast job at a time per process
+_job_lock = asyncio.Lock()
+
+
+class ForecastAlreadyRunning(Exception):
+    """A forecast job is already running in this process"""
+
+
+def is_forecast_running() -> bool:
+    return _job_lock.locked()
+
+
+async def load_sales_matrix(db, history_days: int = DEFAULT_HISTORY_DAYS):
+    """Load daily unit sales per product into a dense (products x days) matrix"""
+    end = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    start = end - timedelta(days=history_days)
+
+    # Aggregate in Postgres so only one row per product/day crosses the wire
+    rows = await db.query_raw(
+        """
+        SELECT product_id, date_trunc('day', date) AS day, SUM(quantity)::float AS quantity
+        FROM sales_data
+        WHERE date >= $1::timestamp AND date < $2::timestamp
+        GROUP BY product_id, day
+        """,
+        start.isoformat(),
+        end.isoformat(),
+    )
+
+    if not rows:
+        return [], np.zeros((0, history_days))
+
+    df = pd.DataFrame(rows)
+    product_codes, product_ids = pd.factorize(df["product_id"])
+    days = pd.to_datetime(df["day"], utc=True).dt.tz_localize(None).dt.normalize()
+    day_index = ((days - pd.Timestamp(start)).dt.days).to_numpy()
+    valid = (day_index >= 0) & (day_index < history_days)
+
+    matrix = np.zeros((len(product_ids), history_days))
+    np.add.at(
+        matrix,
+        (product_codes[valid], day_index[valid]),
+        df["quantity"].to_numpy(dtype=float)[valid],
+    )
+    return list(product_ids), matrix
+
+
+def _forecast_chunk(matrix: np.ndarray, method: str, alpha: float, window: int):
+    """Return (per-day demand forecast, daily demand std) for every row of the matrix"""
+    demand_std = matrix.std(axis=1) if matrix.shape[1] else np.zeros(matrix.shape[0])
+    if method == "sma":
+        return matrix[:, -window:].mean(axis=1), demand_std
+
+    # Simple exponential smoothing written as a weighted sum so the whole
+    # recursion is a single matrix-vector product
+    n_days = matrix.shape[1]
+    weights = alpha * (1 - alpha) ** np.arange(n_days - 1, -1, -1)
+    weights[0] = (1 - alpha) ** (n_days - 1)
+    return matrix @ weights, demand_std
+
+
+def compute_reorder_points(
+    matrix: np.ndarray,
+    horizon_days: int = DEFAULT_HORIZON_DAYS,
+    lead_time_days: int = DEFAULT_LEAD_TIME_DAYS,
+    service_level: float = DEFAULT_SERVICE_LEVEL,
+    method: str = "ses",
+    alpha: float = DEFAULT_ALPHA,
+    window: int = DEFAULT_WINDOW,
+    workers: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """Compute forecasts, safety stock and reorder points for all SKUs at once"""
+    if method not in FORECAST_METHODS:
+        raise ValueError(f"Unknown forecast method: {method}")
+    if not 0 < service_level < 1:
+        raise ValueError("service_level must be between 0 and 1")
+
+    n_rows = matrix.shape[0]
+    workers = workers or os.cpu_count() or 1
+
+    if n_rows >= PARALLEL_MIN_ROWS and workers > 1:
+        # NumPy releases the GIL, so threads share the matrix without copying it
+        chunks = np.array_split(matrix, workers)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(lambda chunk: _forecast_chunk(chunk, method, alpha, window), chunks))
+        daily_forecast = np.concatenate([forecast for forecast, _ in parts])
+        demand_std = np.concatenate([std for _, std in parts])
+    else:
+        daily_forecast, demand_std = _forecast_chunk(matrix, method, alpha, window)
+
+    z = NormalDist().inv_cdf(service_level)
+    safety_stock = z * demand_std * math.sqrt(lead_time_days)
+
+    return {
+        "avg_daily_demand": daily_forecast,
+        "forecast_demand": daily_forecast * horizon_days,
+        "demand_std": demand_std,
+        "safety_stock": safety_stock,
+        "reorder_point": daily_forecast * lead_time_days + safety_stock,
+    }
+
+
+async def load_on_hand(db, product_ids: List[str]) -> np.ndarray:
+    """Get current on-hand inventory aligned to product_ids"""
+    rows = await db.query_raw(
+        "SELECT product_id, SUM(quantity)::float AS quantity FROM inventory GROUP BY product_id"
+    )
+    on_hand = {row["product_id"]: row["quantity"] for row in rows}
+    return np.array([on_hand.get(pid, 0.0) for pid in product_ids], dtype=float)
+
+
+async def store_reorder_suggestions(db, product_ids: List[str], results: Dict[str, np.ndarray],
+                                    on_hand: np.ndarray, horizon_days: int,
+                                    lead_time_days: int, method: str) -> int:
+    """Replace stored reorder suggestions with the latest run"""
+    computed_at = datetime.now()
+    # Order up to horizon demand plus safety stock, but only once stock is at the reorder point
+    target = results["forecast_demand"] + results["safety_stock"]
+    suggested = np.where(
+        on_hand <= results["reorder_point"],
+        np.ceil(np.maximum(target - on_hand, 0)),
+        0,
+    )
+
+    records = [
+        {
+            "product_id": pid,
+            "horizon_days": horizon_days,
+            "lead_time_days": lead_time_days,
+            "method": method,
+            "avg_daily_demand": float(results["avg_daily_demand"][i]),
+            "forecast_demand": float(results["forecast_demand"][i]),
+            "demand_std": float(results["demand_std"][i]),
+            "safety_stock": float(results["safety_stock"][i]),
+            "reorder_point": float(results["reorder_point"][i]),
+            "on_hand": float(on_hand[i]),
+            "suggested_order_qty": int(suggested[i]),
+            "computed_at": computed_at,
+        }
+        for i, pid in enumerate(product_ids)
+    ]
+
+    chunks = math.ceil(len(records) / WRITE_CHUNK_SIZE)
+    timeout = timedelta(seconds=TX_BASE_TIMEOUT_SECONDS + chunks * TX_SECONDS_PER_CHUNK)
+    async with db.tx(timeout=timeout, max_wait=timedelta(seconds=TX_MAX_WAIT_SECONDS)) as tx:
+        # Another worker may be storing its own run; wait for it instead of
+        # colliding on the unique product_id
+        await tx.query_raw("SELECT 1 AS locked FROM pg_advisory_xact_lock($1)", FORECAST_LOCK_ID)
+        await tx.reordersuggestion.delete_many()
+        for i in range(0, len(records), WRITE_CHUNK_SIZE):
+            await tx.reordersuggestion.create_many(data=records[i:i + WRITE_CHUNK_SIZE])
+
+    return len(records)
+
+
+async def run_forecast_job(
+    db,
+    horizon_days: int = DEFAULT_HORIZON_DAYS,
+    lead_time_days: int = DEFAULT_LEAD_TIME_DAYS,
+    service_level: float = DEFAULT_SERVICE_LEVEL,
+    method: str = "ses",
+    history_days: int = DEFAULT_HISTORY_DAYS,
+    workers: Optional[int] = None,
+):
+    """Run the full forecasting batch: load, compute and store"""
+    if _job_lock.locked():
+        raise ForecastAlreadyRunning()
+    async with _job_lock:
+        return await _run_forecast_job(db, horizon_days, lead_time_days, service_level,
+                                       method, history_days, workers)
+
+
+async def _run_forecast_job(db, horizon_days: int, lead_time_days: int, service_level: float,
+                            method: str, history_days: int, workers: Optional[int]):
+    started = datetime.now()
+    product_ids, matrix = await load_sales_matrix(db, history_days)
+
+    if not product_ids:
+        logger.info("Forecast job: no sales history found")
+        return {"products": 0, "duration_seconds": 0.0}
+
+    # Keep the event loop free while numpy does the work
+    loop = asyncio.get_running_loop()
+    results = await loop.run_in_executor(
+        None,
+        lambda: compute_reorder_points(
+            matrix,
+            horizon_days=horizon_days,
+            lead_time_days=lead_time_days,
+            service_level=service_level,
+            method=method,
+            workers=workers,
+        ),
+    )
+
+    on_hand = await load_on_hand(db, product_ids)
+    stored = await store_reorder_suggestions(
+        db, product_ids, results, on_hand, horizon_days, lead_time_days, method
+    )
+
+    duration = (datetime.now() - started).total_seconds()
+    logger.info(f"Forecast job: stored {stored} reorder suggestions in {duration:.2f}s")
+    return {"products": stored, "duration_seconds": duration}
+
+
+async def _main(args):
+    from prisma import Prisma
+
+    db = Prisma()
+    await db.connect()
+    try:
+        summary = await run_forecast_job(
+            db,
+            horizon_days=args.horizon,
+            lead_time_days=args.lead_time,
+            service_level=args.service_level,
+            method=args.method,
+            history_days=args.history,
+            workers=args.workers,
+        )
+        print(summary)
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Compute reorder suggestions for all products")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON_DAYS)
+    parser.add_argument("--lead-time", type=int, default=DEFAULT_LEAD_TIME_DAYS)
+    parser.add_argument("--service-level", type=float, default=DEFAULT_SERVICE_LEVEL)
+    parser.add_argument("--method", choices=FORECAST_METHODS, default="ses")
+    parser.add_argument("--history", type=int, default=DEFAULT_HISTORY_DAYS)
+    parser.add_argument("--workers", type=int, default=None)
+    asyncio.run(_main(parser.parse_args()))
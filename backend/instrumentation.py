@@ -0,0 +1,238 @@
+import functools
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Request, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+ROUND_TRIP_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 1000, 5000)
+
+# HTTP
+REQUEST_LATENCY = Histogram(
+    "wms_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "wms_http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+
+# Database
+DB_QUERY_LATENCY = Histogram(
+    "wms_db_query_duration_seconds",
+    "Prisma round-trip latency by route and operation",
+    ["route", "model", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_ROUND_TRIPS_PER_REQUEST = Histogram(
+    "wms_db_round_trips_per_request",
+    "Number of Prisma round trips made while serving one request",
+    ["route"],
+    buckets=ROUND_TRIP_BUCKETS,
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "wms_db_time_per_request_seconds",
+    "Total time spent in Prisma while serving one request",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+
+# Ingestion
+INGESTED_ROWS = Counter(
+    "wms_ingestion_rows_total",
+    "Rows seen by sales data ingestion",
+    ["status"],
+)
+INGESTION_THROUGHPUT = Histogram(
+    "wms_ingestion_rows_per_second",
+    "Rows per second for each ingested file",
+    buckets=(10, 100, 500, 1000, 5000, 10000, 50000, 100000, 500000),
+)
+
+# OpenAI
+OPENAI_LATENCY = Histogram(
+    "wms_openai_request_duration_seconds",
+    "OpenAI API call latency",
+    ["model", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+OPENAI_TOKENS = Counter(
+    "wms_openai_tokens_total",
+    "OpenAI tokens used",
+    ["model", "type"],
+)
+
+UNMATCHED_ROUTE = "unmatched"
+BACKGROUND_ROUTE = "background"
+_current_route: ContextVar[str] = ContextVar("current_route", default=BACKGROUND_ROUTE)
+_request_stats: ContextVar[Optional[dict]] = ContextVar("request_stats", default=None)
+
+
+async def metrics_middleware(request: Request, call_next):
+    """Record latency, in-flight count and DB usage for every request"""
+    # Route matching happens inside call_next, so resolve the label up front
+    route = UNMATCHED_ROUTE
+    for candidate in request.app.router.routes:
+        match, _ = candidate.matches(request.scope)
+        if match.name == "FULL":
+            route = getattr(candidate, "path", UNMATCHED_ROUTE)
+            break
+
+    method = request.method
+    stats = {"db_calls": 0, "db_seconds": 0.0}
+    route_token = _current_route.set(route)
+    stats_token = _request_stats.set(stats)
+    in_progress = REQUESTS_IN_PROGRESS.labels(method=method, route=route)
+    in_progress.inc()
+    started = time.perf_counter()
+
+    def finish(status: str, streaming: bool = False):
+        # Server-sent event streams stay open for the whole session; they are
+        # counted as in progress but kept out of the latency histogram
+        if not streaming:
+            REQUEST_LATENCY.labels(method=method, route=route, status=status).observe(
+                time.perf_counter() - started
+            )
+            DB_ROUND_TRIPS_PER_REQUEST.labels(route=route).observe(stats["db_calls"])
+            DB_TIME_PER_REQUEST.labels(route=route).observe(stats["db_seconds"])
+        in_progress.dec()
+
+    try:
+        response = await call_next(request)
+    except Exception:
+        finish("500")
+        raise
+    finally:
+        _current_route.reset(route_token)
+        _request_stats.reset(stats_token)
+
+    # call_next returns once headers are ready; the request ends when the body does
+    status = str(response.status_code)
+    streaming = response.headers.get("content-type", "").startswith("text/event-stream")
+    body = response.body_iterator
+
+    async def tracked_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            finish(status, streaming)
+
+    response.body_iterator = tracked_body()
+    return response
+
+
+def _observe_query(model: str, operation: str, elapsed: float):
+    DB_QUERY_LATENCY.labels(route=_current_route.get(), model=model, operation=operation).observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats["db_calls"] += 1
+        stats["db_seconds"] += elapsed
+
+
+@functools.lru_cache(maxsize=None)
+def _instrumented_class(base: type) -> type:
+    """Subclass of the generated client that times every query it sends"""
+
+    class InstrumentedPrisma(base):
+        # The generated client uses __slots__, so methods can't be patched per instance
+        __slots__ = ()
+        _instrumented = True
+
+        async def _execute(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await super()._execute(*args, **kwargs)
+            finally:
+                # The generated client passes the model class, or nothing for raw queries
+                model = getattr(kwargs.get("model"), "__name__", "raw")
+                _observe_query(model, str(kwargs.get("method", "unknown")), time.perf_counter() - started)
+
+        def _copy(self):
+            # tx() runs its queries on a copy of the client
+            return instrument_prisma(super()._copy())
+
+        def batch_(self):
+            # Batches send all their queries in one engine call that bypasses _execute
+            batch = super().batch_()
+            commit = batch.commit
+
+            @functools.wraps(commit)
+            async def timed_commit():
+                started = time.perf_counter()
+                try:
+                    return await commit()
+                finally:
+                    _observe_query("batch", "commit", time.perf_counter() - started)
+
+            batch.commit = timed_commit
+            return batch
+
+    InstrumentedPrisma.__name__ = base.__name__
+    InstrumentedPrisma.__qualname__ = base.__qualname__
+    return InstrumentedPrisma
+
+
+def instrument_prisma(client):
+    """Time every Prisma query issued through the client, its transactions and batches"""
+    base = type(client)
+    if getattr(base, "_instrumented", False):
+        return client
+    if not hasattr(base, "_execute"):
+        logger.warning("Prisma client has no _execute hook; DB metrics disabled")
+        return client
+
+    client.__class__ = _instrumented_class(base)
+    return client
+
+
+def record_ingestion(accepted: int, rejected: int, seconds: float):
+    """Record the outcome of ingesting one file"""
+    INGESTED_ROWS.labels(status="accepted").inc(accepted)
+    INGESTED_ROWS.labels(status="rejected").inc(rejected)
+    if seconds > 0:
+        INGESTION_THROUGHPUT.observe((accepted + rejected) / seconds)
+
+
+def record_openai_call(model: str, seconds: float, response=None, status: str = "ok"):
+    """Record latency and token usage of one OpenAI call"""
+    OPENAI_LATENCY.labels(model=model, status=status).observe(seconds)
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        OPENAI_TOKENS.labels(model=model, type="prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+        OPENAI_TOKENS.labels(model=model, type="completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+
+
+def metrics_response() -> Response:
+    """Render all metrics in the Prometheus text format"""
+    registry = REGISTRY
+    # Under serve.py every worker writes its own files; aggregate them all
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_worker_dead():
+    """Let the multiprocess collector drop this worker's live gauges"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
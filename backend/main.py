@@ -1,6 +1,7 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Depends
+from fastapi import FastAPI, HTTPException, UploadFile, File, Depends, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
 import pandas as pd
 import json
 import os
@@ -11,6 +12,20 @@ import openai
 from pydantic import BaseModel
 import asyncio
 from prisma import Prisma
+from forecasting import run_forecast_job, is_forecast_running, FORECAST_METHODS
+from metrics_stream import MetricsBroadcaster
+from charts import generate_chart_data
+from catalog import ProductCatalog
+from storage import PrismaStorage, MemoryStorage
+from cache_bus import CacheBus
+from config import worker_database_url
+from orders import ingest_order_export
+from profiling import ProfilingMiddleware, profile_store
+from instrumentation import (
+    metrics_middleware, instrument_prisma, record_ingestion, record_openai_call, metrics_response,
+    mark_worker_dead
+)
+import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -19,6 +34,9 @@ logger = logging.getLogger(__name__)
 # Initialize FastAPI app
 app = FastAPI(title="WMS API", version="1.0.0")
 
+# Opt-in request profiling (WMS_PROFILING); added first so it stays the innermost middleware
+app.add_middleware(ProfilingMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -28,8 +46,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize Prisma client
-prisma = Prisma()
+# Record per-route latency, in-flight requests and DB usage
+app.middleware("http")(metrics_middleware)
+
+# Storage backend: "prisma" (Postgres, default) or "memory" for profiling and load tests
+STORAGE_BACKEND = os.getenv("WMS_STORAGE", "prisma")
+
+if STORAGE_BACKEND == "memory":
+    prisma = None
+    storage = MemoryStorage()
+else:
+    # Initialize Prisma client; serve.py sets a per-worker pool size
+    database_url = worker_database_url()
+    prisma = Prisma(datasource={"url": database_url}) if database_url else Prisma()
+    prisma = instrument_prisma(prisma)
+    storage = PrismaStorage(prisma)
+
+# In-process product snapshot used to skip unchanged product writes on upload
+product_catalog = ProductCatalog()
+
+# Cross-worker cache invalidation; inactive unless serve.py sets a bus directory
+cache_bus = CacheBus(os.getenv("WMS_CACHE_BUS_DIR"))
+DB_CONNECT_RETRIES = 5
 
 # Pydantic models
 class ProductCreate(BaseModel):
@@ -63,27 +101,61 @@ class AIQuery(BaseModel):
     query: str
     chart_type: Optional[str] = None
     openai_key: Optional[str] = None
+    max_points: Optional[int] = None
+    label_column: Optional[str] = None
+    value_columns: Optional[List[str]] = None
 
 # Database connection
 @app.on_event("startup")
 async def startup():
-    await prisma.connect()
+    # The database may still be starting when workers boot
+    for attempt in range(1, DB_CONNECT_RETRIES + 1):
+        try:
+            await storage.connect()
+            break
+        except Exception as e:
+            if attempt == DB_CONNECT_RETRIES:
+                raise
+            logger.error(f"Database connection failed (attempt {attempt}): {str(e)}")
+            await asyncio.sleep(2 ** attempt)
+    await cache_bus.start()
 
 @app.on_event("shutdown")
 async def shutdown():
-    await prisma.disconnect()
+    await cache_bus.stop()
+    await storage.disconnect()
+    mark_worker_dead()
 
 # Health check endpoint
 @app.get("/")
 async def root():
     return {"message": "WMS API is running"}
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return metrics_response()
+
+# Request profiles
+@app.get("/api/profiles")
+async def list_profiles():
+    """List stored request profiles, newest first"""
+    return await asyncio.to_thread(profile_store.list)
+
+@app.get("/api/profiles/{profile_id}")
+async def download_profile(profile_id: str):
+    """Download a profile as folded stacks for flamegraph.pl, speedscope or inferno"""
+    path = profile_store.folded_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=f"profile-{profile_id}.folded")
+
 # Product endpoints
 @app.get("/api/products")
-async def get_products():
-    """Get all products"""
+async def get_products(skip: int = 0, take: Optional[int] = None):
+    """Get products ordered by SKU, optionally one page at a time"""
     try:
-        products = await prisma.product.find_many()
+        products = await storage.list_products(skip=skip, take=take)
         return {"products": products}
     except Exception as e:
         logger.error(f"Error fetching products: {str(e)}")
@@ -93,7 +165,11 @@ async def get_products():
 async def create_product(product: ProductCreate):
     """Create a new product"""
     try:
-        new_product = await prisma.product.create(data=product.dict())
+        new_product = await storage.create_product(product.dict())
+        product_catalog.put(
+            new_product["sku"], new_product["id"], new_product["name"], new_product["price"], new_product["cost"]
+        )
+        broadcast_change("catalog", "metrics")
         return {"product": new_product}
     except Exception as e:
         logger.error(f"Error creating product: {str(e)}")
@@ -109,6 +185,7 @@ async def upload_sales_data(file: UploadFile = File(...)):
         
         # Process the data
         processed_data = await process_sales_data(df)
+        broadcast_change("catalog", "metrics")
         
         return {
             "message": "Data uploaded successfully",
@@ -121,7 +198,9 @@ async def upload_sales_data(file: UploadFile = File(...)):
 
 async def process_sales_data(df: pd.DataFrame):
     """Process sales data and store in database"""
-    processed_rows = []
+    started = time.perf_counter()
+    parsed_rows = []
+    products = {}
     
     for _, row in df.iterrows():
         try:
@@ -129,83 +208,175 @@ async def process_sales_data(df: pd.DataFrame):
             sku = str(row.get('sku', row.get('product_sku', '')))
             name = str(row.get('product_name', row.get('name', '')))
             
-            # Create or update product
-            product = await prisma.product.upsert(
-                where={"sku": sku},
-                data={
-                    "create": {
-                        "sku": sku,
-                        "name": name,
-                        "category": str(row.get('category', '')),
-                        "price": float(row.get('price', 0)),
-                        "cost": float(row.get('cost', 0))
-                    },
-                    "update": {
-                        "name": name,
-                        "price": float(row.get('price', 0)),
-                        "cost": float(row.get('cost', 0))
-                    }
-                }
-            )
-            
-            # Create sales data entry
-            sales_data = await prisma.salesdata.create(
-                data={
-                    "date": datetime.now(),
-                    "quantity": int(row.get('quantity', 0)),
-                    "revenue": float(row.get('revenue', 0)),
-                    "cost": float(row.get('cost', 0)),
-                    "marketplace": str(row.get('marketplace', '')),
-                    "product_id": product.id
-                }
-            )
+            # Last row wins when a SKU appears more than once, as with per-row upserts
+            products[sku] = {
+                "sku": sku,
+                "name": name,
+                "category": str(row.get('category', '')),
+                "price": float(row.get('price', 0)),
+                "cost": float(row.get('cost', 0))
+            }
             
-            processed_rows.append({
+            parsed_rows.append({
                 "sku": sku,
                 "name": name,
                 "quantity": int(row.get('quantity', 0)),
-                "revenue": float(row.get('revenue', 0))
+                "revenue": float(row.get('revenue', 0)),
+                "cost": float(row.get('cost', 0)),
+                "marketplace": str(row.get('marketplace', ''))
+            })
+            
+        except Exception as e:
+            logger.error(f"Error processing row: {str(e)}")
+            continue
+    
+    # Only new or changed products reach the database
+    product_ids = await product_catalog.sync(storage, products)
+    
+    processed_rows = []
+    for row in parsed_rows:
+        try:
+            # Create sales data entry
+            sales_data = await storage.create_sale({
+                "date": datetime.now(),
+                "quantity": row["quantity"],
+                "revenue": row["revenue"],
+                "cost": row["cost"],
+                "marketplace": row["marketplace"],
+                "product_id": product_ids[row["sku"]]
+            })
+            
+            processed_rows.append({
+                "sku": row["sku"],
+                "name": row["name"],
+                "quantity": row["quantity"],
+                "revenue": row["revenue"]
             })
             
         except Exception as e:
             logger.error(f"Error processing row: {str(e)}")
             continue
     
+    record_ingestion(
+        accepted=len(processed_rows),
+        rejected=len(df) - len(processed_rows),
+        seconds=time.perf_counter() - started
+    )
     return processed_rows
 
-# Metrics and dashboard endpoints
-@app.get("/api/metrics")
-async def get_metrics():
-    """Get dashboard metrics"""
+@app.post("/api/orders/upload")
+async def upload_orders(file: UploadFile = File(...)):
+    """Upload a marketplace order export and create orders, items and sales"""
     try:
-        # Get basic counts
-        total_products = await prisma.product.count()
-        total_orders = await prisma.order.count()
-        total_sales = await prisma.salesdata.count()
-        
-        # Get revenue metrics (simplified)
-        all_sales = await prisma.salesdata.find_many()
-        total_revenue = sum(sale.revenue for sale in all_sales) if all_sales else 0
-        avg_revenue = total_revenue / len(all_sales) if all_sales else 0
-        
-        # Get top products (simplified for now)
-        top_products = await prisma.salesdata.find_many(
-            take=5,
-            order=[{"revenue": "desc"}]
+        started = time.perf_counter()
+        df = pd.read_csv(file.file)
+        summary = await ingest_order_export(storage, product_catalog, df)
+        record_ingestion(
+            accepted=summary["items_created"],
+            rejected=summary["rejected_rows"],
+            seconds=time.perf_counter() - started
         )
+        broadcast_change("catalog", "metrics")
         
         return {
-            "total_products": total_products,
-            "total_orders": total_orders,
-            "total_sales": total_sales,
-            "total_revenue": total_revenue,
-            "avg_revenue": avg_revenue,
-            "top_products": top_products
+            "message": "Orders uploaded successfully",
+            "rows_processed": summary["items_created"],
+            **summary
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error processing order upload: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+
+# Metrics and dashboard endpoints
+async def compute_metrics():
+    """Compute the dashboard metrics snapshot"""
+    return jsonable_encoder(await storage.get_metrics())
+
+# Shared snapshot, recomputed once per data change instead of once per client
+metrics_broadcaster = MetricsBroadcaster(compute_metrics)
+
+# Other workers changed the data: drop the catalog and metrics snapshots
+cache_bus.subscribe("catalog", product_catalog.invalidate)
+cache_bus.subscribe("metrics", metrics_broadcaster.invalidate)
+
+def broadcast_change(*topics):
+    """Refresh this worker's caches and tell the other workers to do the same"""
+    # This worker's catalog was updated in place by the write itself
+    if "metrics" in topics:
+        metrics_broadcaster.notify_change()
+    cache_bus.publish(*topics)
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Get dashboard metrics"""
+    try:
+        return await metrics_broadcaster.get_snapshot()
     except Exception as e:
         logger.error(f"Error fetching metrics: {str(e)}")
         raise HTTPException(status_code=500, detail="Error fetching metrics")
 
+@app.get("/api/metrics/stream")
+async def stream_metrics(request: Request):
+    """Push metric snapshots and diffs to the dashboard as server-sent events"""
+    return StreamingResponse(
+        metrics_broadcaster.stream(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Forecasting endpoints
+@app.post("/api/forecast/run")
+async def run_forecast(
+    background_tasks: BackgroundTasks,
+    horizon_days: int = 30,
+    lead_time_days: int = 7,
+    service_level: float = 0.95,
+    method: str = "ses",
+    history_days: int = 180,
+):
+    """Start the reorder-point batch job for all products"""
+    if prisma is None:
+        raise HTTPException(status_code=501, detail="Forecasting requires the Postgres storage backend")
+    if method not in FORECAST_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown forecast method: {method}")
+    if horizon_days <= 0 or lead_time_days < 0 or history_days <= 0:
+        raise HTTPException(status_code=400, detail="Invalid forecast window")
+    if not 0 < service_level < 1:
+        raise HTTPException(status_code=400, detail="service_level must be between 0 and 1")
+    if is_forecast_running():
+        raise HTTPException(status_code=409, detail="A forecast job is already running")
+
+    background_tasks.add_task(
+        run_forecast_job,
+        prisma,
+        horizon_days=horizon_days,
+        lead_time_days=lead_time_days,
+        service_level=service_level,
+        method=method,
+        history_days=history_days,
+    )
+    return {"message": "Forecast job started", "horizon_days": horizon_days}
+
+@app.get("/api/reorder-suggestions")
+async def get_reorder_suggestions(limit: int = 100, only_reorder: bool = False):
+    """Get stored reorder suggestions, largest order quantities first"""
+    if prisma is None:
+        return {"suggestions": []}
+    try:
+        where = {"suggested_order_qty": {"gt": 0}} if only_reorder else {}
+        suggestions = await prisma.reordersuggestion.find_many(
+            where=where,
+            take=limit,
+            order=[{"suggested_order_qty": "desc"}],
+            include={"product": True}
+        )
+        return {"suggestions": suggestions}
+    except Exception as e:
+        logger.error(f"Error fetching reorder suggestions: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error fetching reorder suggestions")
+
 # AI-powered query endpoint
 @app.post("/api/query")
 async def ai_query(query: AIQuery):
@@ -231,14 +402,21 @@ async def ai_query(query: AIQuery):
         """
         
         # Generate SQL using OpenAI
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a SQL expert. Generate only SQL queries."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=200
-        )
+        model = "gpt-3.5-turbo"
+        openai_started = time.perf_counter()
+        try:
+            response = openai.ChatCompletion.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": "You are a SQL expert. Generate only SQL queries."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=200
+            )
+        except Exception:
+            record_openai_call(model, time.perf_counter() - openai_started, status="error")
+            raise
+        record_openai_call(model, time.perf_counter() - openai_started, response)
         
         sql_query = response.choices[0].message.content.strip()
         
@@ -249,7 +427,13 @@ async def ai_query(query: AIQuery):
             # Generate chart data if requested
             chart_data = None
             if query.chart_type:
-                chart_data = generate_chart_data(result, query.chart_type)
+                chart_data = generate_chart_data(
+                    result,
+                    query.chart_type,
+                    max_points=query.max_points,
+                    label_column=query.label_column,
+                    value_columns=query.value_columns
+                )
             
             return {
                 "query": query.query,
@@ -325,35 +509,12 @@ async def execute_sql_query(sql: str):
         logger.error(f"Error executing SQL: {str(e)}")
         raise HTTPException(status_code=500, detail="Error executing query")
 
-def generate_chart_data(result: dict, chart_type: str):
-    """Generate chart data based on query result"""
-    if chart_type == "bar":
-        return {
-            "type": "bar",
-            "labels": [row[0] for row in result["data"]],
-            "datasets": [{
-                "label": "Revenue",
-                "data": [row[1] for row in result["data"]]
-            }]
-        }
-    elif chart_type == "line":
-        return {
-            "type": "line",
-            "labels": [row[0] for row in result["data"]],
-            "datasets": [{
-                "label": "Revenue",
-                "data": [row[1] for row in result["data"]]
-            }]
-        }
-    else:
-        return None
-
 # SKU mapping endpoints
 @app.get("/api/sku-mappings")
 async def get_sku_mappings():
     """Get all SKU mappings"""
     try:
-        mappings = await prisma.skumapping.find_many()
+        mappings = await storage.list_sku_mappings()
         return {"mappings": mappings}
     except Exception as e:
         logger.error(f"Error fetching SKU mappings: {str(e)}")
@@ -363,13 +524,11 @@ async def get_sku_mappings():
 async def create_sku_mapping(sku: str, msku: str, marketplace: Optional[str] = None):
     """Create a new SKU mapping"""
     try:
-        mapping = await prisma.skumapping.create(
-            data={
-                "sku": sku,
-                "msku": msku,
-                "marketplace": marketplace
-            }
-        )
+        mapping = await storage.create_sku_mapping({
+            "sku": sku,
+            "msku": msku,
+            "marketplace": marketplace
+        })
         return {"mapping": mapping}
     except Exception as e:
         logger.error(f"Error creating SKU mapping: {str(e)}")
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Per-subscriber queue depth before a slow client starts losing intermediate diffs
+SUBSCRIBER_QUEUE_SIZE = 8
+# Changes arriving within this window are folded into a single recompute
+DEBOUNCE_SECONDS = 0.5
+HEARTBEAT_SECONDS = 15
+
+
+class Subscriber:
+    """A connected dashboard waiting for metric updates"""
+
+    def __init__(self, maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, diff_message: dict, snapshot_message: dict):
+        """Queue an update without ever blocking the publisher"""
+        try:
+            self.queue.put_nowait(diff_message)
+        except asyncio.QueueFull:
+            # Slow client: throw away its backlog and resync with one snapshot
+            self._drain()
+            self.queue.put_nowait(snapshot_message)
+
+    def _drain(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+
+class MetricsBroadcaster:
+    """Computes dashboard metrics once per change and fans them out to subscribers"""
+
+    def __init__(self, compute: Callable[[], Awaitable[Dict[str, Any]]]):
+        self._compute = compute
+        self._subscribers: Set[Subscriber] = set()
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._version = 0
+        self._pending: Optional[asyncio.Task] = None
+        self._dirty = False
+        self._lock = asyncio.Lock()
+        # Bumped on every change; a refresh that started before a change
+        # must not cache its (already stale) result
+        self._generation = 0
+        # Shared recompute for callers waiting on a missing snapshot
+        self._inflight: Optional[asyncio.Future] = None
+        self._inflight_generation = -1
+
+    @property
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        return self._snapshot
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    async def get_snapshot(self) -> Dict[str, Any]:
+        """Return the cached snapshot; concurrent callers share one recompute"""
+        if self._snapshot is not None:
+            return self._snapshot
+        if (self._inflight is None or self._inflight.done()
+                or self._inflight_generation != self._generation):
+            self._inflight = asyncio.ensure_future(self.refresh())
+            self._inflight_generation = self._generation
+        # Shield so one disconnecting caller doesn't cancel the others' result
+        return await asyncio.shield(self._inflight)
+
+    def notify_change(self):
+        """Schedule a recompute; bursts of changes collapse into one"""
+        self._generation += 1
+        self._dirty = True
+        if self._pending is None or self._pending.done():
+            self._pending = asyncio.create_task(self._debounced_refresh())
+
+    def invalidate(self):
+        """Data changed in another worker: recompute now only if clients are watching.
+
+        Without subscribers the snapshot is just dropped and the next
+        get_snapshot() recomputes it, so N workers don't all reload the data.
+        """
+        if self._subscribers or (self._pending is not None and not self._pending.done()):
+            self.notify_change()
+        else:
+            self._generation += 1
+            self._snapshot = None
+
+    async def _debounced_refresh(self):
+        # Keep going while changes land during a refresh so none are missed
+        while self._dirty:
+            await asyncio.sleep(DEBOUNCE_SECONDS)
+            self._dirty = False
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing metrics snapshot: {str(e)}")
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Recompute metrics, publish the result and return it"""
+        async with self._lock:
+            generation = self._generation
+            snapshot = await self._compute()
+            if generation != self._generation:
+                # Data changed while computing: hand the result to this caller
+                # only; the change's own refresh (or next reader) recomputes
+                return snapshot
+            previous = self._snapshot
+            if previous is not None and snapshot == previous:
+                return previous
+
+            self._snapshot = snapshot
+            self._version += 1
+
+            snapshot_message = {"type": "snapshot", "version": self._version, "data": snapshot}
+            if previous is None:
+                diff_message = snapshot_message
+            else:
+                changes = {k: v for k, v in snapshot.items() if previous.get(k) != v}
+                removed = [k for k in previous if k not in snapshot]
+                diff_message = {
+                    "type": "diff",
+                    "version": self._version,
+                    "base_version": self._version - 1,
+                    "changes": changes,
+                    "removed": removed,
+                }
+
+            for subscriber in list(self._subscribers):
+                subscriber.offer(diff_message, snapshot_message)
+            return snapshot
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber()
+        if self._snapshot is not None:
+            subscriber.queue.put_nowait(
+                {"type": "snapshot", "version": self._version, "data": self._snapshot}
+            )
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    async def stream(self, request):
+        """Yield server-sent events for one client until it disconnects"""
+        # New clients always start from a full snapshot
+        await self.get_snapshot()
+        subscriber = self.subscribe()
+        try:
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    message = await asyncio.wait_for(
+                        subscriber.queue.get(), timeout=HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(message)
+        finally:
+            self.unsubscribe(subscriber)
+
+
+def format_sse(message: dict) -> str:
+    """Encode a message as a server-sent event"""
+    return f"event: {message['type']}\nid: {message['version']}\ndata: {json.dumps(message, default=str)}\n\n"
@@ -0,0 +1,205 @@
+import logging
+import uuid
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Orders written per transaction, together with all of their items and sales rows
+ORDER_CHUNK_SIZE = 1000
+
+# Marketplace exports name the same fields differently
+COLUMN_ALIASES = {
+    "order_number": ["order_number", "order_id", "amazon_order_id", "order_no", "order"],
+    "order_date": ["order_date", "purchase_date", "date", "created_at"],
+    "customer_name": ["customer_name", "buyer_name", "customer", "ship_name"],
+    "status": ["status", "order_status"],
+    "marketplace": ["marketplace", "sales_channel", "channel"],
+    "sku": ["sku", "product_sku", "seller_sku"],
+    "product_name": ["product_name", "name", "title", "item_name"],
+    "quantity": ["quantity", "qty", "quantity_purchased"],
+    "unit_price": ["unit_price", "item_price", "price"],
+    "line_total": ["total_price", "line_total", "item_total", "revenue", "amount"],
+    "cost": ["cost", "item_cost"],
+}
+REQUIRED_COLUMNS = ("order_number", "sku", "quantity")
+
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Rename export columns to the canonical names used below"""
+    cleaned = {
+        col: str(col).strip().lower().replace("-", "_").replace(" ", "_")
+        for col in df.columns
+    }
+    df = df.rename(columns=cleaned)
+
+    renames = {}
+    for target, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in df.columns and alias not in renames and target not in renames.values():
+                renames[alias] = target
+                break
+    return df[list(renames)].rename(columns=renames)
+
+
+def _money(series: pd.Series) -> pd.Series:
+    """Parse prices that may be formatted like "$1,234.50" """
+    if not pd.api.types.is_numeric_dtype(series):
+        series = series.astype(str).str.replace(r"[$,\s]", "", regex=True)
+    return pd.to_numeric(series, errors="coerce")
+
+
+def _text(series: pd.Series) -> pd.Series:
+    """Strip strings and turn blanks into None"""
+    series = series.astype("string").str.strip()
+    return series.where(series.notna() & (series != ""), None).astype(object)
+
+
+def parse_order_export(df: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+    """Clean an order export into one row per line item; returns (lines, rejected rows)"""
+    df = normalize_columns(df)
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Order export is missing columns: {', '.join(missing)}")
+
+    lines = pd.DataFrame({
+        "order_number": _text(df["order_number"]),
+        "sku": _text(df["sku"]),
+        "quantity": pd.to_numeric(df["quantity"], errors="coerce"),
+    })
+    lines["product_name"] = _text(df["product_name"]) if "product_name" in df else None
+    lines["product_name"] = lines["product_name"].fillna(lines["sku"])
+    for col in ("customer_name", "status", "marketplace"):
+        lines[col] = _text(df[col]) if col in df else None
+
+    now = datetime.now()
+    if "order_date" in df:
+        lines["order_date"] = pd.to_datetime(df["order_date"], errors="coerce").fillna(now)
+    else:
+        lines["order_date"] = pd.Timestamp(now)
+
+    unit_price = _money(df["unit_price"]) if "unit_price" in df else pd.Series(np.nan, index=df.index)
+    line_total = _money(df["line_total"]) if "line_total" in df else pd.Series(np.nan, index=df.index)
+    # Fill whichever of unit price and line total the export left out
+    lines["unit_price"] = unit_price.fillna(line_total / lines["quantity"])
+    lines["line_total"] = line_total.fillna(unit_price * lines["quantity"])
+    lines["cost"] = _money(df["cost"]) if "cost" in df else np.nan
+
+    valid = (
+        lines["order_number"].notna()
+        & lines["sku"].notna()
+        & (lines["quantity"] > 0)
+        & lines["unit_price"].notna()
+    )
+    rejected = int((~valid).sum())
+    lines = lines[valid].copy()
+    lines["quantity"] = lines["quantity"].astype(int)
+    return lines, rejected
+
+
+def _new_ids(count: int) -> List[str]:
+    return ["c" + uuid.uuid4().hex for _ in range(count)]
+
+
+def _records(df: pd.DataFrame) -> List[dict]:
+    """DataFrame rows as dicts of plain Python values (NaN -> None)"""
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict("records")
+
+
+async def ingest_order_export(storage, catalog, df: pd.DataFrame) -> Dict[str, int]:
+    """Create orders, order items and linked sales rows from one order export"""
+    lines, rejected = parse_order_export(df)
+    if lines.empty:
+        return {"orders_created": 0, "items_created": 0, "duplicate_orders": 0, "rejected_rows": rejected}
+
+    # One lookup for every order number in the file; existing orders are skipped
+    # before any product is created for them
+    order_numbers = lines["order_number"].unique().tolist()
+    existing = await storage.find_order_ids(order_numbers)
+    duplicate_orders = len(existing)
+    lines = lines[~lines["order_number"].isin(existing.keys())].copy()
+    if lines.empty:
+        return {"orders_created": 0, "items_created": 0,
+                "duplicate_orders": duplicate_orders, "rejected_rows": rejected}
+
+    # Products: create unknown SKUs, resolve known ones from the catalog snapshot
+    product_rows = lines.drop_duplicates("sku", keep="last")
+    products = {
+        row["sku"]: {
+            "sku": row["sku"],
+            "name": row["product_name"],
+            "category": "",
+            "price": float(row["unit_price"]),
+            "cost": 0.0,
+        }
+        for row in product_rows[["sku", "product_name", "unit_price"]].to_dict("records")
+    }
+    product_ids = await catalog.sync(storage, products, update_existing=False)
+    lines["product_id"] = lines["sku"].map(product_ids)
+
+    # Keep each order's lines contiguous so chunks can be sliced by position
+    order_index, numbers = pd.factorize(lines["order_number"])
+    lines = lines.assign(order_index=order_index).sort_values("order_index", kind="stable")
+    order_ids = np.array(_new_ids(len(numbers)), dtype=object)
+    lines["order_id"] = order_ids[lines["order_index"].to_numpy()]
+
+    orders = lines.groupby("order_index", sort=True).agg(
+        order_number=("order_number", "first"),
+        order_date=("order_date", "first"),
+        customer_name=("customer_name", "first"),
+        status=("status", "first"),
+        marketplace=("marketplace", "first"),
+        total_amount=("line_total", "sum"),
+    )
+    orders["id"] = order_ids[orders.index.to_numpy()]
+    orders["status"] = orders["status"].fillna("pending")
+
+    items = pd.DataFrame({
+        "id": _new_ids(len(lines)),
+        "order_id": lines["order_id"].to_numpy(),
+        "product_id": lines["product_id"].to_numpy(),
+        "quantity": lines["quantity"].to_numpy(),
+        "unit_price": lines["unit_price"].to_numpy(dtype=float),
+        "total_price": lines["line_total"].to_numpy(dtype=float),
+    })
+    sales = pd.DataFrame({
+        "date": lines["order_date"].to_numpy(),
+        "quantity": lines["quantity"].to_numpy(),
+        "revenue": lines["line_total"].to_numpy(dtype=float),
+        "cost": lines["cost"].to_numpy(dtype=float),
+        "profit": (lines["line_total"] - lines["cost"]).to_numpy(dtype=float),
+        "marketplace": lines["marketplace"].to_numpy(),
+        "product_id": lines["product_id"].to_numpy(),
+        "order_id": lines["order_id"].to_numpy(),
+    })
+
+    # Line boundaries of each order chunk, found with one searchsorted over the sorted index
+    line_orders = lines["order_index"].to_numpy()
+    order_columns = ["id", "order_number", "customer_name", "order_date", "total_amount", "status", "marketplace"]
+    orders_created = 0
+    items_created = 0
+    for start in range(0, len(orders), ORDER_CHUNK_SIZE):
+        end = min(start + ORDER_CHUNK_SIZE, len(orders))
+        lo, hi = np.searchsorted(line_orders, [start, end])
+        created = await storage.create_orders(
+            _records(orders.iloc[start:end][order_columns]),
+            _records(items.iloc[lo:hi]),
+            _records(sales.iloc[lo:hi]),
+        )
+        orders_created += created["orders"]
+        items_created += created["items"]
+
+    # Orders a concurrent upload inserted first count as duplicates too
+    duplicate_orders += len(orders) - orders_created
+    logger.info(f"Order ingestion: {orders_created} orders, {items_created} items, "
+                f"{duplicate_orders} duplicate orders, {rejected} rejected rows")
+    return {
+        "orders_created": orders_created,
+        "items_created": items_created,
+        "duplicate_orders": duplicate_orders,
+        "rejected_rows": rejected,
+    }
@@ -0,0 +1,320 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILER_FILE = os.path.abspath(__file__)
+
+# Root frames of the flamegraph: where the request's time went
+ON_CPU = "on-cpu"
+AWAITING = "awaiting"
+TOP_CALL_SITES = 20
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        logger.error(f"Invalid {name}, using {default}")
+        return default
+
+
+def _frame_label(code, lineno: int) -> str:
+    """Readable frame name: function (file:line), with no folded-format separators"""
+    filename = code.co_filename
+    if filename.startswith(APP_DIR):
+        filename = os.path.relpath(filename, APP_DIR)
+    elif "site-packages" in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    else:
+        filename = os.path.basename(filename)
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({filename}:{lineno})".replace(";", ",")
+
+
+def _thread_stack(frame) -> List[tuple]:
+    """(label, is_app_code) for a thread's frames, outermost first"""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        is_app = code.co_filename.startswith(APP_DIR) and code.co_filename != PROFILER_FILE
+        stack.append((_frame_label(code, frame.f_lineno), is_app))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _await_stack(coro) -> List[str]:
+    """Labels of a suspended task's await chain, ending with what it is waiting on"""
+    stack = []
+    awaitable = coro
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None) \
+            or getattr(awaitable, "ag_frame", None)
+        if frame is None:
+            break
+        stack.append(_frame_label(frame.f_code, frame.f_lineno))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None) \
+            or getattr(awaitable, "ag_await", None)
+    if awaitable is not None:
+        stack.append(f"[{type(awaitable).__name__}]")
+    return stack
+
+
+class Profile:
+    """Samples collected for one request"""
+
+    def __init__(self, task: asyncio.Task, thread_id: int, trigger: str, method: str, path: str):
+        self.id = uuid.uuid4().hex
+        self.task = task
+        self.thread_id = thread_id
+        self.trigger = trigger
+        self.method = method
+        self.path = path
+        self.status: Optional[int] = None
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        # Folded stack -> microseconds of wall time
+        self.stacks: Counter = Counter()
+        # Application call site -> microseconds spent holding the event loop
+        self.blocking: Counter = Counter()
+        self.samples = 0
+
+    def sample(self, frames: Dict[int, object], weight_us: int):
+        coro = self.task.get_coro()
+        if getattr(coro, "cr_running", False):
+            # The request's own code is running: it is blocking the event loop
+            frame = frames.get(self.thread_id)
+            if frame is None:
+                return
+            stack = _thread_stack(frame)
+            labels = [label for label, _ in stack]
+            app_frames = [label for label, is_app in stack if is_app]
+            self.stacks[";".join([ON_CPU] + labels)] += weight_us
+            self.blocking[app_frames[-1] if app_frames else labels[-1]] += weight_us
+        else:
+            # Suspended on I/O (database, OpenAI) or waiting for the loop
+            stack = _await_stack(coro)
+            if not stack:
+                return
+            self.stacks[";".join([AWAITING] + stack)] += weight_us
+        self.samples += 1
+
+    def summary(self) -> dict:
+        on_cpu = sum(us for stack, us in self.stacks.items() if stack.startswith(ON_CPU))
+        awaiting = sum(us for stack, us in self.stacks.items() if stack.startswith(AWAITING))
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "trigger": self.trigger,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 2),
+            "samples": self.samples,
+            "on_cpu_ms": round(on_cpu / 1000, 2),
+            "awaiting_ms": round(awaiting / 1000, 2),
+            "blocking_call_sites": [
+                {"call_site": site, "ms": round(us / 1000, 2)}
+                for site, us in self.blocking.most_common(TOP_CALL_SITES)
+            ],
+        }
+
+    def folded(self) -> str:
+        """Brendan Gregg's folded stack format, weighted in microseconds"""
+        return "".join(f"{stack} {us}\n" for stack, us in sorted(self.stacks.items()))
+
+
+class Sampler:
+    """One background thread that samples every request being profiled.
+
+    The thread only runs while at least one profile is active, so the
+    profiler costs nothing when no request has opted in.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._active: Dict[str, Profile] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, profile: Profile):
+        with self._lock:
+            self._active[profile.id] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="wms-profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile: Profile):
+        """Stop sampling a profile; waits for a sampling pass in progress"""
+        with self._lock:
+            self._active.pop(profile.id, None)
+
+    def _run(self):
+        last = time.perf_counter()
+        while True:
+            time.sleep(self.interval)
+            # Sample under the lock so remove() returns only once no pass is
+            # still writing to the profile being saved
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                # Weight by real elapsed time: C code holding the GIL delays the sampler
+                now = time.perf_counter()
+                weight_us = int((now - last) * 1_000_000)
+                last = now
+                frames = sys._current_frames()
+                for profile in self._active.values():
+                    try:
+                        profile.sample(frames, weight_us)
+                    except Exception as e:
+                        logger.debug(f"Profiler sample failed: {str(e)}")
+                del frames
+
+
+class ProfileStore:
+    """Profiles on disk as <id>.folded plus a <id>.json summary, newest N kept"""
+
+    def __init__(self, directory: str, keep: int):
+        self.directory = directory
+        self.keep = keep
+
+    def _path(self, profile_id: str, ext: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.{ext}")
+
+    def save(self, profile: Profile):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(profile.id, "folded"), "w") as f:
+            f.write(profile.folded())
+        with open(self._path(profile.id, "json"), "w") as f:
+            json.dump(profile.summary(), f)
+        self._prune()
+
+    def _prune(self):
+        saved = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                saved.append((os.path.getmtime(os.path.join(self.directory, name)), name))
+            except FileNotFoundError:
+                continue
+        saved.sort(reverse=True)
+        for _, name in saved[self.keep:]:
+            profile_id = name[:-len(".json")]
+            for ext in ("json", "folded"):
+                try:
+                    os.unlink(self._path(profile_id, ext))
+                except FileNotFoundError:
+                    # Another worker pruned it first
+                    pass
+
+    def list(self) -> List[dict]:
+        if not os.path.isdir(self.directory):
+            return []
+        summaries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    summaries.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return sorted(summaries, key=lambda s: s["started_at"], reverse=True)
+
+    def folded_path(self, profile_id: str) -> Optional[str]:
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = self._path(profile_id, "folded")
+        return path if os.path.exists(path) else None
+
+
+# Configuration; profiling is off unless WMS_PROFILING is set
+PROFILING_ENABLED = os.getenv("WMS_PROFILING", "").lower() in ("1", "true", "yes")
+PROFILE_SAMPLE_RATE = _env_float("WMS_PROFILE_SAMPLE_RATE", 0.0)
+PROFILE_THRESHOLD_MS = _env_float("WMS_PROFILE_THRESHOLD_MS", 500.0)
+PROFILE_INTERVAL_MS = _env_float("WMS_PROFILE_INTERVAL_MS", 5.0)
+PROFILE_KEEP = int(_env_float("WMS_PROFILE_KEEP", 20))
+PROFILE_DIR = os.getenv("WMS_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "wms-profiles"))
+
+profile_store = ProfileStore(PROFILE_DIR, PROFILE_KEEP)
+_sampler = Sampler(PROFILE_INTERVAL_MS / 1000)
+
+
+class ProfilingMiddleware:
+    """Profile requests that send an X-Profile header or are picked by the sample rate.
+
+    Header requests are always stored and get an X-Profile-Id response header;
+    sampled requests are only stored when slower than WMS_PROFILE_THRESHOLD_MS.
+    This is plain ASGI middleware and must be the innermost one: function
+    middleware runs the endpoint in a separate task, and the profiler follows
+    the task the endpoint runs in.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _trigger(self, scope) -> Optional[str]:
+        if not PROFILING_ENABLED:
+            return None
+        for name, value in scope.get("headers", []):
+            if name == PROFILE_HEADER and value.strip() not in (b"", b"0", b"false"):
+                return "header"
+        if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(
+            task=asyncio.current_task(),
+            thread_id=threading.get_ident(),
+            trigger=trigger,
+            method=scope["method"],
+            path=scope["path"],
+        )
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                if trigger == "header":
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (PROFILE_ID_HEADER, profile.id.encode())
+                    ]
+            await send(message)
+
+        _sampler.add(profile)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _sampler.remove(profile)
+            profile.duration = time.perf_counter() - profile.started
+            if trigger == "header" or profile.duration * 1000 >= PROFILE_THRESHOLD_MS:
+                try:
+                    # Small files, but keep disk writes off the event loop
+                    await asyncio.to_thread(profile_store.save, profile)
+                except OSError as e:
+                    logger.error(f"Error saving profile {profile.id}: {str(e)}")
@@ -0,0 +1,67 @@
+"""Production server: runs the API in several worker processes.
+
+Usage:
+    python serve.py --workers 4 --max-db-connections 40
+"""
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+
+import uvicorn
+
+from config import DEFAULT_MAX_DB_CONNECTIONS, DEFAULT_POOL_TIMEOUT, worker_pool_size
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GRACEFUL_TIMEOUT = 30
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the WMS API with multiple worker processes")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WMS_WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--max-db-connections", type=int,
+                        default=int(os.getenv("WMS_MAX_DB_CONNECTIONS", DEFAULT_MAX_DB_CONNECTIONS)),
+                        help="Total Postgres connections shared by all workers")
+    parser.add_argument("--db-pool-size", type=int, default=None,
+                        help="Connections per worker (default: max-db-connections / workers)")
+    parser.add_argument("--db-pool-timeout", type=int,
+                        default=int(os.getenv("WMS_DB_POOL_TIMEOUT", DEFAULT_POOL_TIMEOUT)))
+    parser.add_argument("--graceful-timeout", type=int, default=DEFAULT_GRACEFUL_TIMEOUT,
+                        help="Seconds to let in-flight requests finish on shutdown")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    workers = max(1, args.workers)
+    pool_size = args.db_pool_size or worker_pool_size(workers, args.max_db_connections)
+
+    # Workers inherit these and configure themselves on import
+    runtime_dir = tempfile.mkdtemp(prefix="wms-")
+    os.environ["WMS_DB_POOL_SIZE"] = str(pool_size)
+    os.environ["WMS_DB_POOL_TIMEOUT"] = str(args.db_pool_timeout)
+    os.environ["WMS_CACHE_BUS_DIR"] = os.path.join(runtime_dir, "bus")
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(runtime_dir, "prometheus")
+    os.makedirs(os.environ["WMS_CACHE_BUS_DIR"])
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+    logger.info(f"Starting {workers} workers, {pool_size} DB connections each")
+    try:
+        uvicorn.run(
+            "main:app",
+            app_dir=os.path.dirname(os.path.abspath(__file__)),
+            host=args.host,
+            port=args.port,
+            workers=workers,
+            timeout_graceful_shutdown=args.graceful_timeout,
+            log_level=args.log_level,
+        )
+    finally:
+        shutil.rmtree(runtime_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,495 @@
+import logging
+import math
+import uuid
+from abc import ABC, abstractmethod
+from array import array
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CATALOG_UPDATE_FIELDS = ("name", "price", "cost")
+TOP_PRODUCTS_LIMIT = 5
+
+
+class StorageError(Exception):
+    """Raised when an operation violates the data model"""
+
+
+class UniqueConstraintError(StorageError):
+    pass
+
+
+class RecordNotFoundError(StorageError):
+    pass
+
+
+class Storage(ABC):
+    """Operations the API needs for products, sales, SKU mappings and metrics.
+
+    Records are plain dicts using the Prisma field names.
+    """
+
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    # Products
+    @abstractmethod
+    async def list_products(self, skip: int = 0, take: Optional[int] = None) -> List[dict]:
+        """Products ordered by SKU"""
+
+    @abstractmethod
+    async def count_products(self) -> int:
+        pass
+
+    @abstractmethod
+    async def create_product(self, data: dict) -> dict:
+        pass
+
+    @abstractmethod
+    async def create_products(self, rows: List[dict]) -> int:
+        """Insert products, skipping SKUs that already exist; returns the number inserted"""
+
+    @abstractmethod
+    async def find_products_by_sku(self, skus: List[str]) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def update_products(self, rows: List[dict]):
+        """Update name, price and cost of existing products, matched by SKU"""
+
+    @abstractmethod
+    async def catalog_rows(self) -> List[dict]:
+        """id, sku, name, price and cost for every product"""
+
+    # Sales
+    @abstractmethod
+    async def create_sale(self, data: dict) -> dict:
+        pass
+
+    # Orders
+    @abstractmethod
+    async def find_order_ids(self, order_numbers: List[str]) -> Dict[str, str]:
+        """Map the order numbers that already exist to their ids in one lookup"""
+
+    @abstractmethod
+    async def create_orders(self, orders: List[dict], items: List[dict], sales: List[dict]) -> Dict[str, int]:
+        """Insert orders with their line items and sales rows in one transaction.
+
+        Orders whose number already exists (e.g. inserted by a concurrent
+        upload) are skipped together with their items and sales rows.
+        Returns the number of orders and items actually created.
+        """
+
+    # Metrics
+    @abstractmethod
+    async def get_metrics(self) -> Dict[str, Any]:
+        pass
+
+    # SKU mappings
+    @abstractmethod
+    async def list_sku_mappings(self) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def create_sku_mapping(self, data: dict) -> dict:
+        pass
+
+
+def _to_dict(record) -> dict:
+    return record.model_dump() if hasattr(record, "model_dump") else record.dict()
+
+
+class PrismaStorage(Storage):
+    """Storage backed by Postgres through the Prisma client"""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def connect(self):
+        await self.client.connect()
+
+    async def disconnect(self):
+        await self.client.disconnect()
+
+    async def list_products(self, skip: int = 0, take: Optional[int] = None) -> List[dict]:
+        products = await self.client.product.find_many(skip=skip, take=take, order={"sku": "asc"})
+        return [_to_dict(p) for p in products]
+
+    async def count_products(self) -> int:
+        return await self.client.product.count()
+
+    async def create_product(self, data: dict) -> dict:
+        return _to_dict(await self.client.product.create(data=data))
+
+    async def create_products(self, rows: List[dict]) -> int:
+        return await self.client.product.create_many(data=rows, skip_duplicates=True)
+
+    async def find_products_by_sku(self, skus: List[str]) -> List[dict]:
+        products = await self.client.product.find_many(where={"sku": {"in": skus}})
+        return [_to_dict(p) for p in products]
+
+    async def update_products(self, rows: List[dict]):
+        async with self.client.batch_() as batcher:
+            for row in rows:
+                batcher.product.update(
+                    where={"sku": row["sku"]},
+                    data={field: row[field] for field in CATALOG_UPDATE_FIELDS}
+                )
+
+    async def catalog_rows(self) -> List[dict]:
+        return await self.client.query_raw("SELECT id, sku, name, price, cost FROM products")
+
+    async def create_sale(self, data: dict) -> dict:
+        return _to_dict(await self.client.salesdata.create(data=data))
+
+    async def find_order_ids(self, order_numbers: List[str]) -> Dict[str, str]:
+        orders = await self.client.order.find_many(where={"order_number": {"in": order_numbers}})
+        return {order.order_number: order.id for order in orders}
+
+    async def create_orders(self, orders: List[dict], items: List[dict], sales: List[dict]) -> Dict[str, int]:
+        async with self.client.tx() as tx:
+            await tx.order.create_many(data=orders, skip_duplicates=True)
+            # Re-check inside the transaction: numbers taken by a concurrent upload
+            # keep that upload's id, and their lines must not be written twice
+            stored = await tx.order.find_many(
+                where={"order_number": {"in": [order["order_number"] for order in orders]}}
+            )
+            created = {order.id for order in stored} & {order["id"] for order in orders}
+            items = [item for item in items if item["order_id"] in created]
+            sales = [sale for sale in sales if sale.get("order_id") in created]
+            if items:
+                await tx.orderitem.create_many(data=items)
+            if sales:
+                await tx.salesdata.create_many(data=sales)
+        return {"orders": len(created), "items": len(items)}
+
+    async def get_metrics(self) -> Dict[str, Any]:
+        # Get basic counts
+        total_products = await self.client.product.count()
+        total_orders = await self.client.order.count()
+        total_sales = await self.client.salesdata.count()
+
+        # Get revenue metrics (simplified)
+        all_sales = await self.client.salesdata.find_many()
+        total_revenue = sum(sale.revenue for sale in all_sales) if all_sales else 0
+        avg_revenue = total_revenue / len(all_sales) if all_sales else 0
+
+        # Get top products (simplified for now)
+        top_products = await self.client.salesdata.find_many(
+            take=TOP_PRODUCTS_LIMIT,
+            order=[{"revenue": "desc"}]
+        )
+
+        return {
+            "total_products": total_products,
+            "total_orders": total_orders,
+            "total_sales": total_sales,
+            "total_revenue": total_revenue,
+            "avg_revenue": avg_revenue,
+            "top_products": [_to_dict(s) for s in top_products]
+        }
+
+    async def list_sku_mappings(self) -> List[dict]:
+        return [_to_dict(m) for m in await self.client.skumapping.find_many()]
+
+    async def create_sku_mapping(self, data: dict) -> dict:
+        return _to_dict(await self.client.skumapping.create(data=data))
+
+
+def _new_id() -> str:
+    return "c" + uuid.uuid4().hex
+
+
+def _nullable(value: Optional[float]) -> float:
+    return float("nan") if value is None else float(value)
+
+
+def _from_nullable(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+class MemoryStorage(Storage):
+    """In-process storage with the same semantics as PrismaStorage.
+
+    Products and sales are kept column-wise: strings in lists, numbers in
+    typed arrays, so metrics are computed with NumPy over whole columns.
+    Sales reference products by row index rather than by id.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # Products
+        self._p_id: List[str] = []
+        self._p_sku: List[str] = []
+        self._p_msku: List[Optional[str]] = []
+        self._p_name: List[str] = []
+        self._p_description: List[Optional[str]] = []
+        self._p_category: List[Optional[str]] = []
+        self._p_price = array("d")
+        self._p_cost = array("d")
+        self._p_created_at: List[datetime] = []
+        self._p_updated_at: List[datetime] = []
+        self._p_by_sku: Dict[str, int] = {}
+        self._p_by_id: Dict[str, int] = {}
+        # Row indexes ordered by sku for pagination; rebuilt lazily after inserts
+        self._p_sku_order: Optional[List[int]] = None
+
+        # Sales
+        self._s_id: List[str] = []
+        self._s_date: List[datetime] = []
+        self._s_quantity = array("q")
+        self._s_revenue = array("d")
+        self._s_cost = array("d")
+        self._s_profit = array("d")
+        self._s_marketplace: List[Optional[str]] = []
+        self._s_product = array("q")
+        self._s_order_id: List[Optional[str]] = []
+
+        # Orders
+        self._o_id: List[str] = []
+        self._o_number: List[str] = []
+        self._o_customer: List[Optional[str]] = []
+        self._o_date: List[datetime] = []
+        self._o_total = array("d")
+        self._o_status: List[str] = []
+        self._o_marketplace: List[Optional[str]] = []
+        self._o_by_number: Dict[str, int] = {}
+        self._o_by_id: Dict[str, int] = {}
+
+        # Order items
+        self._i_id: List[str] = []
+        self._i_order = array("q")
+        self._i_product = array("q")
+        self._i_quantity = array("q")
+        self._i_unit_price = array("d")
+        self._i_total_price = array("d")
+
+        # SKU mappings
+        self._mappings: List[dict] = []
+        self._mapping_skus: Dict[str, int] = {}
+
+    # Products
+    def _product(self, i: int) -> dict:
+        return {
+            "id": self._p_id[i],
+            "sku": self._p_sku[i],
+            "msku": self._p_msku[i],
+            "name": self._p_name[i],
+            "description": self._p_description[i],
+            "category": self._p_category[i],
+            "price": _from_nullable(self._p_price[i]),
+            "cost": _from_nullable(self._p_cost[i]),
+            "created_at": self._p_created_at[i],
+            "updated_at": self._p_updated_at[i],
+        }
+
+    def _insert_product(self, data: dict) -> int:
+        now = datetime.now()
+        i = len(self._p_id)
+        product_id = data.get("id") or _new_id()
+        self._p_id.append(product_id)
+        self._p_sku.append(data["sku"])
+        self._p_msku.append(data.get("msku"))
+        self._p_name.append(data["name"])
+        self._p_description.append(data.get("description"))
+        self._p_category.append(data.get("category"))
+        self._p_price.append(_nullable(data.get("price")))
+        self._p_cost.append(_nullable(data.get("cost")))
+        self._p_created_at.append(now)
+        self._p_updated_at.append(now)
+        self._p_by_sku[data["sku"]] = i
+        self._p_by_id[product_id] = i
+        self._p_sku_order = None
+        return i
+
+    async def list_products(self, skip: int = 0, take: Optional[int] = None) -> List[dict]:
+        if self._p_sku_order is None:
+            self._p_sku_order = sorted(range(len(self._p_sku)), key=self._p_sku.__getitem__)
+        order = self._p_sku_order
+        end = None if take is None else skip + take
+        return [self._product(i) for i in order[skip:end]]
+
+    async def count_products(self) -> int:
+        return len(self._p_id)
+
+    async def create_product(self, data: dict) -> dict:
+        if data["sku"] in self._p_by_sku:
+            raise UniqueConstraintError(f"Product with sku {data['sku']} already exists")
+        return self._product(self._insert_product(data))
+
+    async def create_products(self, rows: List[dict]) -> int:
+        inserted = 0
+        for row in rows:
+            if row["sku"] not in self._p_by_sku:
+                self._insert_product(row)
+                inserted += 1
+        return inserted
+
+    async def find_products_by_sku(self, skus: List[str]) -> List[dict]:
+        return [self._product(self._p_by_sku[sku]) for sku in skus if sku in self._p_by_sku]
+
+    async def update_products(self, rows: List[dict]):
+        # Validate first so a missing SKU leaves nothing half-applied, like the batched transaction
+        missing = [row["sku"] for row in rows if row["sku"] not in self._p_by_sku]
+        if missing:
+            raise RecordNotFoundError(f"Product with sku {missing[0]} not found")
+
+        now = datetime.now()
+        for row in rows:
+            i = self._p_by_sku[row["sku"]]
+            self._p_name[i] = row["name"]
+            self._p_price[i] = _nullable(row["price"])
+            self._p_cost[i] = _nullable(row["cost"])
+            self._p_updated_at[i] = now
+
+    async def catalog_rows(self) -> List[dict]:
+        return [
+            {
+                "id": self._p_id[i],
+                "sku": self._p_sku[i],
+                "name": self._p_name[i],
+                "price": _from_nullable(self._p_price[i]),
+                "cost": _from_nullable(self._p_cost[i]),
+            }
+            for i in range(len(self._p_id))
+        ]
+
+    # Sales
+    def _sale(self, i: int) -> dict:
+        return {
+            "id": self._s_id[i],
+            "date": self._s_date[i],
+            "quantity": self._s_quantity[i],
+            "revenue": self._s_revenue[i],
+            "cost": _from_nullable(self._s_cost[i]),
+            "profit": _from_nullable(self._s_profit[i]),
+            "marketplace": self._s_marketplace[i],
+            "product_id": self._p_id[self._s_product[i]],
+            "order_id": self._s_order_id[i],
+        }
+
+    def _product_index(self, product_id: str) -> int:
+        product = self._p_by_id.get(product_id)
+        if product is None:
+            raise StorageError(f"Foreign key violation: product {product_id} does not exist")
+        return product
+
+    def _check_order(self, order_id: Optional[str]):
+        if order_id is not None and order_id not in self._o_by_id:
+            raise StorageError(f"Foreign key violation: order {order_id} does not exist")
+
+    async def create_sale(self, data: dict) -> dict:
+        product = self._product_index(data["product_id"])
+        self._check_order(data.get("order_id"))
+        return self._sale(self._append_sale(data, product))
+
+    def _append_sale(self, data: dict, product: int) -> int:
+        i = len(self._s_id)
+        self._s_id.append(data.get("id") or _new_id())
+        self._s_date.append(data["date"])
+        self._s_quantity.append(int(data["quantity"]))
+        self._s_revenue.append(float(data["revenue"]))
+        self._s_cost.append(_nullable(data.get("cost")))
+        self._s_profit.append(_nullable(data.get("profit")))
+        self._s_marketplace.append(data.get("marketplace"))
+        self._s_product.append(product)
+        self._s_order_id.append(data.get("order_id"))
+        return i
+
+    # Orders
+    async def find_order_ids(self, order_numbers: List[str]) -> Dict[str, str]:
+        return {
+            number: self._o_id[self._o_by_number[number]]
+            for number in order_numbers if number in self._o_by_number
+        }
+
+    async def create_orders(self, orders: List[dict], items: List[dict], sales: List[dict]) -> Dict[str, int]:
+        # Existing order numbers are skipped with their lines, like skip_duplicates
+        new_numbers = set()
+        kept = []
+        for order in orders:
+            number = order["order_number"]
+            if number not in self._o_by_number and number not in new_numbers:
+                new_numbers.add(number)
+                kept.append(order)
+        orders = kept
+        new_ids = {order["id"] for order in orders}
+        items = [item for item in items if item["order_id"] in new_ids]
+        sales = [sale for sale in sales if sale.get("order_id") in new_ids]
+
+        # Check every constraint before writing so a failed chunk changes nothing
+        for row in items + sales:
+            self._product_index(row["product_id"])
+            if row.get("order_id") is not None and row["order_id"] not in new_ids:
+                self._check_order(row["order_id"])
+
+        for order in orders:
+            i = len(self._o_id)
+            self._o_id.append(order["id"])
+            self._o_number.append(order["order_number"])
+            self._o_customer.append(order.get("customer_name"))
+            self._o_date.append(order["order_date"])
+            self._o_total.append(float(order["total_amount"]))
+            self._o_status.append(order.get("status") or "pending")
+            self._o_marketplace.append(order.get("marketplace"))
+            self._o_by_number[order["order_number"]] = i
+            self._o_by_id[order["id"]] = i
+
+        for item in items:
+            self._i_id.append(item.get("id") or _new_id())
+            self._i_order.append(self._o_by_id[item["order_id"]])
+            self._i_product.append(self._p_by_id[item["product_id"]])
+            self._i_quantity.append(int(item["quantity"]))
+            self._i_unit_price.append(float(item["unit_price"]))
+            self._i_total_price.append(float(item["total_price"]))
+
+        for sale in sales:
+            self._append_sale(sale, self._p_by_id[sale["product_id"]])
+        return {"orders": len(orders), "items": len(items)}
+
+    # Metrics
+    async def get_metrics(self) -> Dict[str, Any]:
+        revenue = np.frombuffer(self._s_revenue, dtype=np.float64) if len(self._s_revenue) else np.zeros(0)
+        total_sales = len(revenue)
+        total_revenue = float(revenue.sum()) if total_sales else 0
+        avg_revenue = total_revenue / total_sales if total_sales else 0
+
+        # Stable sort so ties keep insertion order
+        top = np.argsort(-revenue, kind="stable")[:TOP_PRODUCTS_LIMIT]
+
+        return {
+            "total_products": len(self._p_id),
+            "total_orders": len(self._o_id),
+            "total_sales": total_sales,
+            "total_revenue": total_revenue,
+            "avg_revenue": avg_revenue,
+            "top_products": [self._sale(int(i)) for i in top]
+        }
+
+    # SKU mappings
+    async def list_sku_mappings(self) -> List[dict]:
+        return [dict(m) for m in self._mappings]
+
+    async def create_sku_mapping(self, data: dict) -> dict:
+        if data["sku"] in self._mapping_skus:
+            raise UniqueConstraintError(f"SKU mapping for {data['sku']} already exists")
+        now = datetime.now()
+        mapping = {
+            "id": _new_id(),
+            "sku": data["sku"],
+            "msku": data["msku"],
+            "marketplace": data.get("marketplace"),
+            "created_at": now,
+            "updated_at": now,
+        }
+        self._mapping_skus[data["sku"]] = len(self._mappings)
+        self._mappings.append(mapping)
+        return dict(mapping)
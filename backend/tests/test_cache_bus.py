@@ -0,0 +1,84 @@
+import asyncio
+import os
+import socket
+
+import cache_bus
+from cache_bus import CacheBus
+
+
+async def start_as(bus, pid, monkeypatch):
+    # Each bus binds a socket named after its worker pid
+    monkeypatch.setattr(cache_bus.os, "getpid", lambda: pid)
+    await bus.start()
+
+
+def test_publish_reaches_other_workers_but_not_itself(tmp_path, monkeypatch):
+    received = {"first": [], "second": []}
+
+    async def run():
+        first, second = CacheBus(str(tmp_path)), CacheBus(str(tmp_path))
+        first.subscribe("catalog", lambda: received["first"].append("catalog"))
+        second.subscribe("catalog", lambda: received["second"].append("catalog"))
+        second.subscribe("metrics", lambda: received["second"].append("metrics"))
+        await start_as(first, 1001, monkeypatch)
+        await start_as(second, 1002, monkeypatch)
+        try:
+            first.publish("catalog", "metrics")
+            await asyncio.sleep(0.05)
+        finally:
+            await first.stop()
+            await second.stop()
+
+    asyncio.run(run())
+
+    assert received == {"first": [], "second": ["catalog", "metrics"]}
+    assert not any(name.endswith(".sock") for name in os.listdir(tmp_path))
+
+
+def test_dispatch_ignores_own_messages():
+    bus = CacheBus()
+    calls = []
+    bus.subscribe("catalog", lambda: calls.append(1))
+
+    bus.dispatch({"origin": bus.pid, "topics": ["catalog"]})
+    bus.dispatch({"origin": bus.pid + 1, "topics": ["catalog", "unknown"]})
+
+    assert calls == [1]
+
+
+def test_failing_handler_does_not_block_others():
+    bus = CacheBus()
+    calls = []
+
+    def broken():
+        raise RuntimeError("boom")
+
+    bus.subscribe("catalog", broken)
+    bus.subscribe("catalog", lambda: calls.append(1))
+    bus.dispatch({"origin": -1, "topics": ["catalog"]})
+
+    assert calls == [1]
+
+
+def test_publish_removes_sockets_of_dead_workers(tmp_path, monkeypatch):
+    # A worker that exited without unlinking its socket
+    stale = tmp_path / "999.sock"
+    dead = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    dead.bind(str(stale))
+    dead.close()
+
+    async def run():
+        bus = CacheBus(str(tmp_path))
+        await start_as(bus, 1001, monkeypatch)
+        try:
+            bus.publish("catalog")
+        finally:
+            await bus.stop()
+
+    asyncio.run(run())
+
+    assert not stale.exists()
+
+
+def test_single_process_publish_is_a_no_op():
+    CacheBus().publish("catalog")
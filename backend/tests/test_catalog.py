@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+
+import catalog as catalog_module
+from catalog import ProductCatalog
+from storage import MemoryStorage
+
+
+class CountingStorage(MemoryStorage):
+    """MemoryStorage that records which products each write received"""
+
+    def clear(self):
+        super().clear()
+        self.created = []
+        self.updated = []
+
+    async def create_products(self, rows):
+        self.created.extend(row["sku"] for row in rows)
+        return await super().create_products(rows)
+
+    async def update_products(self, rows):
+        self.updated.extend(row["sku"] for row in rows)
+        return await super().update_products(rows)
+
+
+class FailingStorage(CountingStorage):
+    async def update_products(self, rows):
+        raise RuntimeError("database went away")
+
+
+def product(sku, name="Apple", price=1.0, cost=0.5):
+    return {"sku": sku, "name": name, "category": "", "price": price, "cost": cost}
+
+
+def seeded(storage_class=CountingStorage):
+    storage = storage_class()
+    asyncio.run(storage.create_products([product("A"), product("B", price=None)]))
+    storage.created.clear()
+    return storage
+
+
+def sync(catalog, storage, products, **kwargs):
+    return asyncio.run(catalog.sync(storage, {p["sku"]: p for p in products}, **kwargs))
+
+
+def test_sync_skips_unchanged_products():
+    storage = seeded()
+    catalog = ProductCatalog()
+
+    ids = sync(catalog, storage, [product("A")])
+
+    assert storage.created == [] and storage.updated == []
+    assert ids == {"A": catalog.get_id("A")}
+
+
+def test_sync_creates_new_and_updates_changed_products():
+    storage = seeded()
+    catalog = ProductCatalog()
+
+    ids = sync(catalog, storage, [product("A", price=2.0), product("C")])
+
+    assert storage.created == ["C"]
+    assert storage.updated == ["A"]
+    assert set(ids) == {"A", "C"}
+    stored = {p["sku"]: p for p in asyncio.run(storage.find_products_by_sku(["A", "C"]))}
+    assert stored["A"]["price"] == 2.0
+    assert ids["C"] == stored["C"]["id"]
+    # The snapshot now holds the written values
+    assert catalog.is_unchanged("A", "Apple", 2.0, 0.5)
+
+
+def test_sync_treats_missing_prices_as_equal():
+    storage = seeded()
+    catalog = ProductCatalog()
+
+    sync(catalog, storage, [product("B", price=float("nan"))])
+    assert storage.updated == []
+
+    sync(catalog, storage, [product("B", price=3.0)])
+    assert storage.updated == ["B"]
+
+
+def test_sync_without_update_existing_only_resolves_known_products():
+    storage = seeded()
+    catalog = ProductCatalog()
+
+    ids = sync(catalog, storage, [product("A", name="Renamed", price=9.0)], update_existing=False)
+
+    assert storage.updated == []
+    assert ids["A"] == catalog.get_id("A")
+
+
+def test_failed_write_invalidates_snapshot():
+    storage = seeded(FailingStorage)
+    catalog = ProductCatalog()
+
+    with pytest.raises(RuntimeError):
+        sync(catalog, storage, [product("A", price=2.0)])
+
+    assert catalog.is_stale
+
+
+def test_snapshot_is_reloaded_after_ttl():
+    storage = seeded()
+    catalog = ProductCatalog(ttl=0)
+    sync(catalog, storage, [product("A")])
+
+    # Changed behind the catalog's back, e.g. by another deployment
+    asyncio.run(MemoryStorage.update_products(storage, [product("A", price=5.0)]))
+    sync(catalog, storage, [product("A")])
+
+    assert storage.updated == ["A"]
+
+
+def test_invalidation_during_load_is_not_lost():
+    storage = seeded()
+    catalog = ProductCatalog()
+    rows = storage.catalog_rows
+
+    async def racing_rows():
+        result = await rows()
+        # Another worker updates A and broadcasts while this query is running
+        await MemoryStorage.update_products(storage, [product("A", price=5.0)])
+        catalog.invalidate()
+        return result
+
+    storage.catalog_rows = racing_rows
+    assert asyncio.run(catalog.load(storage)) is False
+    assert catalog.is_stale
+
+    # The next upload reloads, sees 5.0 and writes the uploaded price back
+    storage.catalog_rows = rows
+    sync(catalog, storage, [product("A", price=1.0)])
+    assert storage.updated == ["A"]
+
+
+def test_updates_are_written_in_chunks(monkeypatch):
+    monkeypatch.setattr(catalog_module, "UPDATE_CHUNK_SIZE", 2)
+    storage = CountingStorage()
+    asyncio.run(storage.create_products([product(f"S{i}") for i in range(5)]))
+    batches = []
+    update = storage.update_products
+
+    async def recording_update(rows):
+        batches.append(len(rows))
+        await update(rows)
+
+    storage.update_products = recording_update
+    catalog = ProductCatalog()
+
+    sync(catalog, storage, [product(f"S{i}", price=2.0) for i in range(5)])
+
+    assert batches == [2, 2, 1]
+    assert all(catalog.is_unchanged(f"S{i}", "Apple", 2.0, 0.5) for i in range(5))
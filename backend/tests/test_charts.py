@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+from charts import (
+    OTHER_LABEL,
+    downsample_lttb,
+    downsample_top_n,
+    generate_chart_data,
+    lttb_indices,
+    pick_columns,
+)
+
+
+def test_lttb_keeps_endpoints_and_respects_threshold():
+    x = np.arange(1000, dtype=float)
+    y = np.sin(x / 30)
+
+    indices = lttb_indices(x, y, 50)
+
+    assert len(indices) == 50
+    assert indices[0] == 0
+    assert indices[-1] == 999
+    assert indices == sorted(set(indices))
+
+
+def test_lttb_keeps_spike():
+    x = np.arange(500, dtype=float)
+    y = np.zeros(500)
+    y[123] = 100.0
+
+    assert 123 in lttb_indices(x, y, 20)
+
+
+def test_lttb_returns_everything_under_threshold():
+    x = np.arange(10, dtype=float)
+    assert lttb_indices(x, x, 10) == list(range(10))
+    assert lttb_indices(x, x, 50) == list(range(10))
+
+
+def test_downsample_lttb_keeps_labels_aligned_across_series():
+    df = pd.DataFrame({
+        "day": pd.date_range("2024-01-01", periods=1000, freq="D"),
+        "revenue": np.arange(1000, dtype=float),
+        "cost": np.arange(1000, dtype=float) * 2,
+    })
+
+    sampled = downsample_lttb(df, "day", ["revenue", "cost"], 100)
+
+    assert len(sampled) <= 100
+    assert sampled["day"].is_monotonic_increasing
+    # Every kept row still carries the label and values of the same original row
+    offsets = (sampled["day"] - pd.Timestamp("2024-01-01")).dt.days
+    assert (sampled["revenue"] == offsets).all()
+    assert (sampled["cost"] == offsets * 2).all()
+
+
+def test_downsample_lttb_respects_budget_with_many_series():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"x": range(100), **{f"s{i}": rng.random(100) for i in range(4)}})
+
+    sampled = downsample_lttb(df, "x", [f"s{i}" for i in range(4)], 5)
+
+    assert len(sampled) <= 5
+
+
+def test_downsample_top_n_folds_rest_into_other():
+    df = pd.DataFrame({
+        "sku": [f"SKU{i}" for i in range(10)],
+        "revenue": [float(i) for i in range(10)],
+        "units": [1] * 10,
+    })
+
+    result = downsample_top_n(df, "sku", ["revenue", "units"], 4)
+
+    assert list(result["sku"]) == ["SKU9", "SKU8", "SKU7", OTHER_LABEL]
+    other = result[result["sku"] == OTHER_LABEL].iloc[0]
+    assert other["revenue"] == sum(range(7))
+    assert other["units"] == 7
+    # Nothing is lost by folding
+    assert result["revenue"].sum() == df["revenue"].sum()
+
+
+def test_downsample_top_n_groups_duplicate_labels():
+    df = pd.DataFrame({"marketplace": ["Amazon", "eBay", "Amazon"], "revenue": [1.0, 2.0, 3.0]})
+
+    result = downsample_top_n(df, "marketplace", ["revenue"], 10)
+
+    assert dict(zip(result["marketplace"], result["revenue"])) == {"Amazon": 4.0, "eBay": 2.0}
+
+
+def test_pick_columns_prefers_text_label_and_numeric_values():
+    df = pd.DataFrame({"units": [1, 2], "sku": ["A", "B"], "revenue": [1.5, 2.5], "active": [True, False]})
+
+    assert pick_columns(df) == ("sku", ["units", "revenue"])
+    assert pick_columns(df, label_column="units") == ("units", ["revenue"])
+    assert pick_columns(df, value_columns=["revenue", "sku", "missing"]) == ("sku", ["revenue"])
+
+
+def test_generate_chart_data_all_text_returns_none():
+    result = {"columns": ["sku", "name"], "data": [["A", "Apple"], ["B", "Banana"]]}
+
+    assert generate_chart_data(result, "bar") is None
+
+
+def test_generate_chart_data_reports_downsampling():
+    result = {"columns": ["day", "revenue"], "data": [[i, float(i % 7)] for i in range(2000)]}
+
+    chart = generate_chart_data(result, "line", max_points=100)
+
+    assert chart["total_points"] == 2000
+    assert chart["returned_points"] == len(chart["labels"]) <= 100
+    assert chart["downsampled"] is True
+    assert len(chart["datasets"][0]["data"]) == len(chart["labels"])
@@ -0,0 +1,36 @@
+from urllib.parse import parse_qs, urlsplit
+
+from config import pooled_database_url, worker_database_url, worker_pool_size
+
+
+def query(url):
+    return {key: values[0] for key, values in parse_qs(urlsplit(url).query).items()}
+
+
+def test_pooled_url_merges_with_existing_parameters():
+    url = pooled_database_url("postgresql://u:p@db:5432/wms?schema=public&connection_limit=99", 8, 15)
+
+    assert url.startswith("postgresql://u:p@db:5432/wms?")
+    assert query(url) == {"schema": "public", "connection_limit": "8", "pool_timeout": "15"}
+
+
+def test_pooled_url_leaves_unset_parameters_alone():
+    url = pooled_database_url("postgresql://db/wms?pool_timeout=3")
+
+    assert query(url) == {"pool_timeout": "3"}
+
+
+def test_worker_pool_size_splits_budget_with_a_floor():
+    assert worker_pool_size(4, 40) == 10
+    assert worker_pool_size(3, 40) == 13
+    assert worker_pool_size(32, 40) == 2
+
+
+def test_worker_database_url_only_when_serve_set_a_pool(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "postgresql://db/wms")
+    monkeypatch.delenv("WMS_DB_POOL_SIZE", raising=False)
+    assert worker_database_url() is None
+
+    monkeypatch.setenv("WMS_DB_POOL_SIZE", "5")
+    monkeypatch.setenv("WMS_DB_POOL_TIMEOUT", "7")
+    assert query(worker_database_url()) == {"connection_limit": "5", "pool_timeout": "7"}
@@ -0,0 +1,94 @@
+import asyncio
+
+import numpy as np
+
+import forecasting
+from forecasting import compute_reorder_points, store_reorder_suggestions
+
+
+def test_ses_matches_the_recursive_definition():
+    rng = np.random.default_rng(0)
+    matrix = rng.poisson(3, (5, 60)).astype(float)
+    alpha = 0.3
+
+    level = matrix[:, 0].copy()
+    for day in range(1, matrix.shape[1]):
+        level = alpha * matrix[:, day] + (1 - alpha) * level
+
+    results = compute_reorder_points(matrix, method="ses", alpha=alpha, workers=1)
+
+    assert np.allclose(results["avg_daily_demand"], level)
+
+
+def test_threaded_chunks_match_serial(monkeypatch):
+    monkeypatch.setattr(forecasting, "PARALLEL_MIN_ROWS", 10)
+    matrix = np.random.default_rng(1).poisson(2, (101, 30)).astype(float)
+
+    serial = compute_reorder_points(matrix, workers=1)
+    threaded = compute_reorder_points(matrix, workers=4)
+
+    for key in serial:
+        assert np.allclose(serial[key], threaded[key])
+
+
+class FakeActions:
+    def __init__(self):
+        self.rows = []
+
+    async def delete_many(self):
+        self.rows = []
+
+    async def create_many(self, data):
+        self.rows.extend(data)
+
+
+class FakeDb:
+    def __init__(self):
+        self.reordersuggestion = FakeActions()
+
+    def tx(self, timeout=None, max_wait=None):
+        self.timeout = timeout
+        db = self
+
+        class Tx:
+            async def __aenter__(self):
+                return db
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Tx()
+
+    async def query_raw(self, query, *args):
+        return []
+
+
+def test_orders_only_at_or_below_reorder_point():
+    results = {
+        "avg_daily_demand": np.array([1.0, 1.0, 1.0]),
+        "forecast_demand": np.array([30.0, 30.0, 30.0]),
+        "demand_std": np.zeros(3),
+        "safety_stock": np.array([5.0, 5.0, 5.0]),
+        "reorder_point": np.array([12.0, 12.0, 12.0]),
+    }
+    on_hand = np.array([10.0, 12.0, 20.0])
+    db = FakeDb()
+
+    asyncio.run(store_reorder_suggestions(db, ["a", "b", "c"], results, on_hand, 30, 7, "ses"))
+
+    suggested = {row["product_id"]: row["suggested_order_qty"] for row in db.reordersuggestion.rows}
+    assert suggested == {"a": 25, "b": 23, "c": 0}
+
+
+def test_transaction_timeout_grows_with_catalog_size():
+    small, large = FakeDb(), FakeDb()
+    for db, n in ((small, 10), (large, 50_000)):
+        results = {key: np.zeros(n) for key in
+                   ("avg_daily_demand", "forecast_demand", "demand_std", "safety_stock", "reorder_point")}
+        ids = [str(i) for i in range(n)]
+        asyncio.run(store_reorder_suggestions(db, ids, results, np.ones(n), 30, 7, "ses"))
+
+    per_chunk = forecasting.TX_SECONDS_PER_CHUNK
+    assert small.timeout.total_seconds() == forecasting.TX_BASE_TIMEOUT_SECONDS + per_chunk
+    # 50k rows are written in 10 chunks
+    assert large.timeout.total_seconds() == forecasting.TX_BASE_TIMEOUT_SECONDS + 10 * per_chunk
@@ -0,0 +1,105 @@
+import asyncio
+
+from prometheus_client import REGISTRY
+
+import instrumentation
+from instrumentation import instrument_prisma
+
+
+class Product:
+    pass
+
+
+class Batch:
+    async def commit(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.commit()
+
+
+class Prisma:
+    """Shape of the generated client: slotted, with copies for transactions"""
+
+    __slots__ = ("_tx_id",)
+
+    def __init__(self):
+        self._tx_id = None
+
+    async def _execute(self, method, arguments, model=None, root_selection=None):
+        return method
+
+    def _copy(self):
+        return Prisma()
+
+    def batch_(self):
+        return Batch()
+
+
+def test_queries_from_client_transactions_and_batches_are_counted():
+    client = instrument_prisma(Prisma())
+    stats = {"db_calls": 0, "db_seconds": 0.0}
+
+    async def run():
+        instrumentation._request_stats.set(stats)
+        await client._execute(method="find_many", arguments={}, model=Product)
+        await client._copy()._execute(method="create_many", arguments={}, model=Product)
+        async with client.batch_():
+            pass
+
+    asyncio.run(run())
+
+    assert stats["db_calls"] == 3
+    assert instrument_prisma(client) is client
+    count = REGISTRY.get_sample_value(
+        "wms_db_query_duration_seconds_count",
+        {"route": instrumentation.BACKGROUND_ROUTE, "model": "Product", "operation": "find_many"},
+    )
+    assert count >= 1
+
+
+def test_streaming_responses_stay_in_progress_until_the_body_completes():
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+    from fastapi.testclient import TestClient
+
+    app = FastAPI()
+    app.middleware("http")(instrumentation.metrics_middleware)
+    seen = {}
+
+    def sample(name, route):
+        return REGISTRY.get_sample_value(name, {"method": "GET", "route": route}) or 0.0
+
+    @app.get("/slow-body")
+    async def slow_body():
+        async def body():
+            seen["in_progress"] = sample("wms_http_requests_in_progress", "/slow-body")
+            await asyncio.sleep(0.05)
+            yield b"done"
+        return StreamingResponse(body())
+
+    @app.get("/events")
+    async def events():
+        async def body():
+            seen["events_in_progress"] = sample("wms_http_requests_in_progress", "/events")
+            yield b"data: {}\n\n"
+        return StreamingResponse(body(), media_type="text/event-stream")
+
+    latency = {"method": "GET", "route": "/slow-body", "status": "200"}
+    events_count = {"method": "GET", "route": "/events", "status": "200"}
+    before = REGISTRY.get_sample_value("wms_http_request_duration_seconds_sum", latency) or 0.0
+    with TestClient(app) as client:
+        assert client.get("/slow-body").content == b"done"
+        assert client.get("/events").status_code == 200
+
+    assert seen["in_progress"] == 1
+    assert seen["events_in_progress"] == 1
+    assert sample("wms_http_requests_in_progress", "/slow-body") == 0
+    assert sample("wms_http_requests_in_progress", "/events") == 0
+    after = REGISTRY.get_sample_value("wms_http_request_duration_seconds_sum", latency)
+    assert after - before >= 0.05
+    # Event streams are long-lived and stay out of the latency histogram
+    assert REGISTRY.get_sample_value("wms_http_request_duration_seconds_count", events_count) is None
@@ -0,0 +1,87 @@
+import asyncio
+
+import metrics_stream
+from metrics_stream import MetricsBroadcaster
+
+
+def counting_broadcaster():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"total": len(calls)}
+
+    return MetricsBroadcaster(compute), calls
+
+
+def test_invalidate_without_subscribers_recomputes_lazily():
+    broadcaster, calls = counting_broadcaster()
+
+    async def run():
+        await broadcaster.get_snapshot()
+        broadcaster.invalidate()
+        await asyncio.sleep(0.05)
+        assert broadcaster.snapshot is None
+        assert len(calls) == 1
+        return await broadcaster.get_snapshot()
+
+    assert asyncio.run(run()) == {"total": 2}
+
+
+def test_invalidate_with_subscribers_pushes_a_diff(monkeypatch):
+    monkeypatch.setattr(metrics_stream, "DEBOUNCE_SECONDS", 0.01)
+    broadcaster, calls = counting_broadcaster()
+
+    async def run():
+        await broadcaster.get_snapshot()
+        subscriber = broadcaster.subscribe()
+        subscriber.queue.get_nowait()
+        broadcaster.invalidate()
+        await asyncio.sleep(0.1)
+        return subscriber.queue.get_nowait()
+
+    message = asyncio.run(run())
+    assert message["type"] == "diff"
+    assert message["changes"] == {"total": 2}
+
+
+def test_concurrent_readers_share_one_compute():
+    broadcaster, calls = counting_broadcaster()
+
+    async def run():
+        await broadcaster.get_snapshot()
+        broadcaster.invalidate()
+        return await asyncio.gather(*(broadcaster.get_snapshot() for _ in range(20)))
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 2
+    assert all(result == {"total": 2} for result in results)
+
+
+def test_invalidation_during_refresh_is_not_lost():
+    started = asyncio.Event
+    values = iter([1, 2])
+
+    async def run():
+        computing = started()
+        release = started()
+
+        async def compute():
+            value = next(values)
+            if value == 1:
+                computing.set()
+                await release.wait()
+            return {"total": value}
+
+        broadcaster = MetricsBroadcaster(compute)
+        first = asyncio.ensure_future(broadcaster.get_snapshot())
+        await computing.wait()
+        # Another worker changes the data while the first compute is running
+        broadcaster.invalidate()
+        release.set()
+        assert await first == {"total": 1}
+        assert broadcaster.snapshot is None
+        return await broadcaster.get_snapshot()
+
+    assert asyncio.run(run()) == {"total": 2}
@@ -0,0 +1,132 @@
+import asyncio
+
+import pandas as pd
+
+from catalog import ProductCatalog
+from orders import ingest_order_export, normalize_columns, parse_order_export
+from storage import MemoryStorage
+
+
+def export(**overrides):
+    data = {
+        "Order-ID": ["A-1", "A-1", "A-2", "A-3"],
+        "Purchase-Date": ["2024-03-01", "2024-03-01", "2024-03-02", "2024-03-02"],
+        "SKU": ["SKU1", "SKU2", "SKU1", "SKU3"],
+        "Quantity": [2, 1, 1, 3],
+        "Item Price": ["$1,234.50", "10", "$5.00", "1"],
+    }
+    data.update(overrides)
+    return pd.DataFrame(data)
+
+
+def ingest(storage, catalog, df):
+    return asyncio.run(ingest_order_export(storage, catalog, df))
+
+
+def test_normalize_columns_maps_aliases_and_keeps_first_match():
+    df = pd.DataFrame(columns=["Amazon Order ID", "order-id", "Item Price", "Price", "Seller SKU", "Notes"])
+
+    normalized = normalize_columns(df)
+
+    # The earliest alias in COLUMN_ALIASES wins when an export has several
+    assert list(normalized.columns) == ["order_number", "sku", "unit_price"]
+    assert normalize_columns(pd.DataFrame({"order-id": ["x"], "amazon_order_id": ["y"]}))["order_number"][0] == "x"
+    assert normalize_columns(pd.DataFrame({"item_price": [1], "price": [2]}))["unit_price"][0] == 1
+
+
+def test_parse_order_export_parses_formatted_prices():
+    lines, rejected = parse_order_export(export())
+
+    assert rejected == 0
+    assert list(lines["unit_price"]) == [1234.5, 10.0, 5.0, 1.0]
+    assert list(lines["line_total"]) == [2469.0, 10.0, 5.0, 3.0]
+
+
+def test_parse_order_export_fills_missing_price_or_total():
+    df = pd.DataFrame({
+        "order_number": ["A-1", "A-2"],
+        "sku": ["SKU1", "SKU2"],
+        "quantity": [4, 2],
+        "unit_price": [2.5, None],
+        "total_price": [None, "$9.00"],
+    })
+
+    lines, rejected = parse_order_export(df)
+
+    assert rejected == 0
+    assert list(lines["unit_price"]) == [2.5, 4.5]
+    assert list(lines["line_total"]) == [10.0, 9.0]
+
+
+def test_parse_order_export_rejects_incomplete_rows():
+    df = pd.DataFrame({
+        "order_number": ["A-1", None, "A-3", "A-4", "A-5"],
+        "sku": ["SKU1", "SKU1", "  ", "SKU1", "SKU1"],
+        "quantity": [1, 1, 1, 0, 1],
+        "unit_price": [1.0, 1.0, 1.0, 1.0, "n/a"],
+    })
+
+    lines, rejected = parse_order_export(df)
+
+    assert rejected == 4
+    assert list(lines["order_number"]) == ["A-1"]
+
+
+def test_parse_order_export_requires_columns():
+    try:
+        parse_order_export(pd.DataFrame({"sku": ["SKU1"]}))
+    except ValueError as e:
+        assert "order_number" in str(e) and "quantity" in str(e)
+    else:
+        raise AssertionError("missing columns were accepted")
+
+
+def test_ingest_creates_orders_items_and_sales():
+    storage = MemoryStorage()
+    summary = ingest(storage, ProductCatalog(), export())
+
+    assert summary == {"orders_created": 3, "items_created": 4, "duplicate_orders": 0, "rejected_rows": 0}
+    metrics = asyncio.run(storage.get_metrics())
+    assert metrics["total_orders"] == 3
+    assert metrics["total_sales"] == 4
+    assert metrics["total_products"] == 3
+
+
+def test_reupload_skips_existing_orders():
+    storage = MemoryStorage()
+    catalog = ProductCatalog()
+    ingest(storage, catalog, export())
+
+    summary = ingest(storage, catalog, export())
+
+    assert summary == {"orders_created": 0, "items_created": 0, "duplicate_orders": 3, "rejected_rows": 0}
+    assert asyncio.run(storage.get_metrics())["total_sales"] == 4
+
+
+def test_duplicate_orders_do_not_create_products():
+    storage = MemoryStorage()
+    catalog = ProductCatalog()
+    ingest(storage, catalog, export())
+
+    summary = ingest(storage, catalog, export(**{"SKU": ["NEW1", "NEW2", "NEW3", "NEW4"]}))
+
+    assert summary["duplicate_orders"] == 3
+    assert asyncio.run(storage.count_products()) == 3
+
+
+def test_orders_inserted_concurrently_are_skipped_with_their_lines():
+    storage = MemoryStorage()
+    catalog = ProductCatalog()
+    ingest(storage, catalog, export())
+
+    # A concurrent upload wrote the orders after this upload's lookup
+    async def stale_lookup(order_numbers):
+        return {}
+
+    storage.find_order_ids = stale_lookup
+    summary = ingest(storage, catalog, export())
+
+    assert summary["orders_created"] == 0
+    assert summary["items_created"] == 0
+    assert summary["duplicate_orders"] == 3
+    assert asyncio.run(storage.get_metrics())["total_sales"] == 4
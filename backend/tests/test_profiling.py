@@ -0,0 +1,54 @@
+import asyncio
+import threading
+import time
+
+import profiling
+from profiling import Profile, ProfileStore, Sampler
+
+
+def busy(seconds):
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        sum(range(1000))
+
+
+def test_sampler_attributes_blocking_and_awaiting_time():
+    sampler = Sampler(0.002)
+
+    async def request():
+        profile = Profile(asyncio.current_task(), threading.get_ident(), "header", "GET", "/x")
+        sampler.add(profile)
+        try:
+            busy(0.05)
+            await asyncio.sleep(0.05)
+        finally:
+            sampler.remove(profile)
+        return profile
+
+    profile = asyncio.run(request())
+    summary = profile.summary()
+
+    assert summary["on_cpu_ms"] > 20
+    assert summary["awaiting_ms"] > 20
+    assert any("busy" in site["call_site"] for site in summary["blocking_call_sites"])
+    for line in profile.folded().splitlines():
+        stack, weight = line.rsplit(" ", 1)
+        assert stack.split(";")[0] in (profiling.ON_CPU, profiling.AWAITING)
+        assert int(weight) > 0
+
+
+def test_store_keeps_newest_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), keep=2)
+
+    async def make():
+        return Profile(asyncio.current_task(), 0, "sampled", "GET", "/x")
+
+    profiles = [asyncio.run(make()) for _ in range(3)]
+    for profile in profiles:
+        store.save(profile)
+        time.sleep(0.01)
+
+    assert {s["id"] for s in store.list()} == {profiles[1].id, profiles[2].id}
+    assert store.folded_path(profiles[0].id) is None
+    assert store.folded_path(profiles[2].id) is not None
+    assert store.folded_path("../" + profiles[2].id) is None
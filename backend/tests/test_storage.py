@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from storage import MemoryStorage, RecordNotFoundError, StorageError, UniqueConstraintError
+
+
+def test_memory_pagination_is_ordered_by_sku_and_sees_inserts():
+    storage = MemoryStorage()
+    asyncio.run(storage.create_products([{"sku": sku, "name": sku} for sku in ["C", "A", "E"]]))
+
+    assert [p["sku"] for p in asyncio.run(storage.list_products(0, 2))] == ["A", "C"]
+
+    asyncio.run(storage.create_product({"sku": "B", "name": "B"}))
+
+    assert [p["sku"] for p in asyncio.run(storage.list_products(0, 2))] == ["A", "B"]
+    assert [p["sku"] for p in asyncio.run(storage.list_products(2))] == ["C", "E"]
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def seeded():
+    storage = MemoryStorage()
+    run(storage.create_products([{"sku": "A", "name": "Apple"}, {"sku": "B", "name": "Banana"}]))
+    return storage, {p["sku"]: p["id"] for p in run(storage.find_products_by_sku(["A", "B"]))}
+
+
+def sale(product_id, revenue, **extra):
+    return {"date": datetime(2024, 1, 1), "quantity": 1, "revenue": revenue, "product_id": product_id, **extra}
+
+
+def test_get_metrics_totals_and_top_sales():
+    storage, ids = seeded()
+    for revenue in [5.0, 20.0, 10.0, 20.0]:
+        run(storage.create_sale(sale(ids["A"], revenue)))
+
+    metrics = run(storage.get_metrics())
+
+    assert metrics["total_products"] == 2
+    assert metrics["total_orders"] == 0
+    assert metrics["total_sales"] == 4
+    assert metrics["total_revenue"] == 55.0
+    assert metrics["avg_revenue"] == 13.75
+    assert [s["revenue"] for s in metrics["top_products"]] == [20.0, 20.0, 10.0, 5.0]
+
+
+def test_get_metrics_on_empty_storage():
+    metrics = run(MemoryStorage().get_metrics())
+
+    assert metrics["total_sales"] == 0
+    assert metrics["total_revenue"] == 0
+    assert metrics["avg_revenue"] == 0
+    assert metrics["top_products"] == []
+
+
+def test_create_sale_rejects_missing_product_or_order():
+    storage, ids = seeded()
+
+    with pytest.raises(StorageError):
+        run(storage.create_sale(sale("missing", 1.0)))
+    with pytest.raises(StorageError):
+        run(storage.create_sale(sale(ids["A"], 1.0, order_id="missing")))
+
+    assert run(storage.get_metrics())["total_sales"] == 0
+
+
+def test_update_products_is_all_or_nothing():
+    storage, _ = seeded()
+
+    with pytest.raises(RecordNotFoundError):
+        run(storage.update_products([
+            {"sku": "A", "name": "Apricot", "price": 2.0, "cost": 1.0},
+            {"sku": "missing", "name": "X", "price": 1.0, "cost": 1.0},
+        ]))
+
+    assert run(storage.find_products_by_sku(["A"]))[0]["name"] == "Apple"
+
+
+def test_create_products_skips_duplicates():
+    storage, ids = seeded()
+
+    inserted = run(storage.create_products([{"sku": "A", "name": "Other"}, {"sku": "C", "name": "Cherry"}]))
+
+    assert inserted == 1
+    assert run(storage.count_products()) == 3
+    apple = run(storage.find_products_by_sku(["A"]))[0]
+    assert apple["name"] == "Apple" and apple["id"] == ids["A"]
+
+
+def test_create_product_and_sku_mapping_reject_duplicates():
+    storage, _ = seeded()
+
+    with pytest.raises(UniqueConstraintError):
+        run(storage.create_product({"sku": "A", "name": "Again"}))
+
+    run(storage.create_sku_mapping({"sku": "AMZ_A", "msku": "A", "marketplace": "Amazon"}))
+    with pytest.raises(UniqueConstraintError):
+        run(storage.create_sku_mapping({"sku": "AMZ_A", "msku": "B"}))
+
+    assert [m["msku"] for m in run(storage.list_sku_mappings())] == ["A"]
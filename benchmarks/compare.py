@@ -0,0 +1,85 @@
+"""Compare two benchmark result files and flag regressions.
+
+Usage:
+    python benchmarks/compare.py baseline.json candidate.json --threshold 0.1
+
+Exits non-zero on a regression, and also when the two runs don't measure
+the same thing (different seed, sizes or storage, or missing benchmarks);
+pass --lenient to only warn about the latter.
+"""
+import argparse
+import json
+import sys
+
+# Run settings that must match for timings to be comparable
+COMPARABLE_META = ("seed", "dirty_rate", "sizes", "db", "storage")
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def index(report):
+    # Older result files have no "size"; their rows were the input size for most benchmarks
+    return {(r["name"], r.get("size", r["rows"])): r for r in report["results"]}
+
+
+def meta_mismatches(baseline_meta, candidate_meta):
+    """Return (setting, baseline value, candidate value) for settings that differ"""
+    return [
+        (key, baseline_meta.get(key), candidate_meta.get(key))
+        for key in COMPARABLE_META
+        if baseline_meta.get(key) != candidate_meta.get(key)
+    ]
+
+
+def compare(baseline, candidate, threshold):
+    """Yield (name, size, baseline median, candidate median, change, regressed) for shared benchmarks"""
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before = baseline[key]["median"]
+        after = candidate[key]["median"]
+        change = (after - before) / before if before else 0.0
+        yield key[0], key[1], before, after, change, change > threshold
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark runs")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Allowed slowdown as a fraction")
+    parser.add_argument("--lenient", action="store_true",
+                        help="Only warn when settings differ or benchmarks are missing")
+    args = parser.parse_args()
+
+    baseline_report, candidate_report = load(args.baseline), load(args.candidate)
+    baseline, candidate = index(baseline_report), index(candidate_report)
+    problems = 0
+
+    for key, before, after in meta_mismatches(baseline_report.get("meta", {}), candidate_report.get("meta", {})):
+        print(f"WARNING: {key} differs: baseline={before} candidate={after}", file=sys.stderr)
+        problems += 1
+    for label, missing in (("candidate", baseline.keys() - candidate.keys()),
+                           ("baseline", candidate.keys() - baseline.keys())):
+        for name, size in sorted(missing):
+            print(f"WARNING: {name} (size {size}) is missing from the {label}", file=sys.stderr)
+            problems += 1
+
+    regressions = 0
+    print(f"{'benchmark':<24} {'size':>10} {'baseline':>10} {'candidate':>10} {'change':>8}")
+    for name, size, before, after, change, regressed in compare(baseline, candidate, args.threshold):
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<24} {size:>10} {before:>10.4f} {after:>10.4f} {change:>+8.1%}{flag}")
+        regressions += regressed
+
+    if not baseline.keys() & candidate.keys():
+        print("ERROR: the two runs have no benchmarks in common", file=sys.stderr)
+        sys.exit(1)
+    if problems and not args.lenient:
+        print("ERROR: the runs are not comparable (use --lenient to compare anyway)", file=sys.stderr)
+        sys.exit(1)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
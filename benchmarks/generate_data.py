@@ -0,0 +1,211 @@
+"""Seeded generator for synthetic warehouse sales and SKU mapping files.
+
+Usage:
+    python benchmarks/generate_data.py --rows 100000 --out bench_data
+"""
+import argparse
+import json
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+MARKETPLACES = ["Amazon", "eBay", "Shopify", "WooCommerce", "Walmart"]
+# Real catalogs sell mostly through one or two channels
+MARKETPLACE_WEIGHTS = [0.55, 0.2, 0.15, 0.07, 0.03]
+MARKETPLACE_PREFIXES = {"Amazon": "AMZ_", "eBay": "EBAY_", "Shopify": "SHOP_", "WooCommerce": "WC_", "Walmart": ""}
+CATEGORIES = ["Fruits", "Berries", "Vegetables", "Dairy", "Bakery", "Beverages", "Snacks", "Frozen"]
+ADJECTIVES = ["Golden", "Silver", "Bronze", "Platinum", "Diamond", "Ruby", "Emerald", "Sapphire", "Topaz", "Amethyst"]
+NOUNS = ["Apple", "Pear", "Orange", "Banana", "Grape", "Strawberry", "Blueberry", "Raspberry", "Cheese", "Bread"]
+
+DEFAULT_SEED = 42
+DEFAULT_DIRTY_RATE = 0.02
+CHUNK_ROWS = 500_000
+HISTORY_DAYS = 365
+
+
+def sku_count_for(rows: int) -> int:
+    """Distinct SKUs for a file size: grows with the file but saturates like a real catalog"""
+    return int(min(max(50, rows // 20), 200_000))
+
+
+def build_catalog(n_skus: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Build the product catalog the sales rows are drawn from"""
+    base = np.array([f"{chr(65 + i % 26)}{chr(65 + (i // 26) % 26)}{i:06d}" for i in range(n_skus)])
+    marketplace = rng.choice(MARKETPLACES, size=n_skus, p=MARKETPLACE_WEIGHTS)
+    prefixes = np.array([MARKETPLACE_PREFIXES[m] for m in marketplace])
+    # A share of listings carry a variant suffix (e.g. AMZ_AB000123_2)
+    suffix = np.where(rng.random(n_skus) < 0.15, np.char.add("_", rng.integers(1, 5, n_skus).astype(str)), "")
+    sku = np.char.add(np.char.add(prefixes, base), suffix)
+
+    names = np.char.add(
+        np.char.add(rng.choice(ADJECTIVES, n_skus), " "), rng.choice(NOUNS, n_skus)
+    )
+    price = np.round(rng.lognormal(mean=3.0, sigma=0.6, size=n_skus), 2)
+    cost = np.round(price * rng.uniform(0.4, 0.8, n_skus), 2)
+
+    return pd.DataFrame({
+        "sku": sku,
+        "product_name": names,
+        "marketplace": marketplace,
+        "category": rng.choice(CATEGORIES, n_skus),
+        "price": price,
+        "cost": cost,
+    })
+
+
+def generate_sales_chunk(catalog: pd.DataFrame, rows: int, rng: np.random.Generator,
+                         dirty_rate: float, start_date: datetime) -> pd.DataFrame:
+    """Draw sales rows with Zipf-like SKU popularity and optional dirty values"""
+    n_skus = len(catalog)
+    # Popularity falls off roughly as 1/rank, so a few SKUs dominate volume
+    weights = 1.0 / np.arange(1, n_skus + 1)
+    picks = rng.choice(n_skus, size=rows, p=weights / weights.sum())
+    products = catalog.iloc[picks].reset_index(drop=True)
+
+    quantity = rng.geometric(0.3, size=rows)
+    unit_price = products["price"].to_numpy() * rng.uniform(0.9, 1.1, rows)
+    days = rng.integers(0, HISTORY_DAYS, rows)
+
+    df = pd.DataFrame({
+        "date": (pd.Timestamp(start_date) + pd.to_timedelta(days, unit="D")).strftime("%Y-%m-%d"),
+        "sku": products["sku"],
+        "product_name": products["product_name"],
+        "quantity": quantity,
+        "revenue": np.round(quantity * unit_price, 2),
+        "price": products["price"],
+        "cost": np.round(quantity * products["cost"].to_numpy(), 2),
+        "marketplace": products["marketplace"],
+        "category": products["category"],
+    })
+
+    if dirty_rate > 0:
+        df = dirty_values(df, rng, dirty_rate)
+    return df
+
+
+def dirty_values(df: pd.DataFrame, rng: np.random.Generator, rate: float) -> pd.DataFrame:
+    """Inject the kinds of mess marketplace exports really contain"""
+    df = df.astype({"quantity": object, "revenue": object, "sku": object, "marketplace": object})
+    rows = len(df)
+
+    def pick():
+        return rng.random(rows) < rate / 6
+
+    df.loc[pick(), "quantity"] = np.nan
+    df.loc[pick(), "quantity"] = -1
+    mask = pick()
+    df.loc[mask, "revenue"] = [f"${v:,.2f}" for v in df.loc[mask, "revenue"]]
+    mask = pick()
+    df.loc[mask, "sku"] = [f"  {v.lower()} " for v in df.loc[mask, "sku"]]
+    mask = pick()
+    df.loc[mask, "marketplace"] = [v.upper() for v in df.loc[mask, "marketplace"]]
+    df.loc[pick(), "product_name"] = ""
+
+    # Duplicated lines from re-exported reports
+    dupes = np.flatnonzero(pick())
+    dupes = dupes[dupes > 0]
+    df.iloc[dupes] = df.iloc[dupes - 1].to_numpy()
+    return df
+
+
+def base_msku(sku: str) -> str:
+    """Master SKU shared by every marketplace listing of the same product"""
+    sku = re.sub(r"^(AMZ|EBAY|SHOP|WC)_", "", sku)
+    return re.sub(r"_[0-9]+$", "", sku)
+
+
+def write_sales(rows: int, out_dir: str, seed: int = DEFAULT_SEED, dirty_rate: float = DEFAULT_DIRTY_RATE,
+                formats=("csv",), reuse: bool = False) -> dict:
+    """Write sales files in chunks so 10M-row files never sit fully in memory"""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    catalog = build_catalog(sku_count_for(rows), rng)
+    start_date = datetime(2024, 1, 1)
+
+    stem = os.path.join(out_dir, f"sales_{rows}_s{seed}_d{dirty_rate:g}")
+    paths = {}
+    parquet_writer = None
+
+    # Output is fully determined by the arguments, so existing files can be reused
+    existing = {fmt: f"{stem}.{fmt}" for fmt in formats}
+    if reuse and all(os.path.exists(path) for path in existing.values()):
+        existing["catalog"] = catalog
+        return existing
+
+    if "csv" in formats:
+        paths["csv"] = f"{stem}.csv"
+        if os.path.exists(paths["csv"]):
+            os.remove(paths["csv"])
+    if "parquet" in formats:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)")
+        paths["parquet"] = f"{stem}.parquet"
+
+    written = 0
+    while written < rows:
+        chunk_rows = min(CHUNK_ROWS, rows - written)
+        chunk = generate_sales_chunk(catalog, chunk_rows, rng, dirty_rate, start_date)
+
+        if "csv" in paths:
+            chunk.to_csv(paths["csv"], mode="a", header=written == 0, index=False)
+        if "parquet" in paths:
+            # Mixed dirty columns are stored as text, as they would arrive from an export
+            table = pa.Table.from_pandas(chunk.astype(str), preserve_index=False)
+            if parquet_writer is None:
+                parquet_writer = pq.ParquetWriter(paths["parquet"], table.schema)
+            parquet_writer.write_table(table)
+        written += chunk_rows
+
+    if parquet_writer is not None:
+        parquet_writer.close()
+
+    paths["catalog"] = catalog
+    return paths
+
+
+def write_sku_mappings(catalog: pd.DataFrame, out_dir: str, seed: int = DEFAULT_SEED,
+                       coverage: float = 0.8) -> dict:
+    """Write SKU mapping files covering part of the catalog, in GUI JSON and CSV form"""
+    rng = np.random.default_rng(seed + 1)
+    mapped = catalog[rng.random(len(catalog)) < coverage]
+
+    mskus = [base_msku(sku) for sku in mapped["sku"]]
+    mappings = {
+        sku: {"msku": msku, "marketplace": marketplace}
+        for sku, msku, marketplace in zip(mapped["sku"], mskus, mapped["marketplace"])
+    }
+
+    stem = os.path.join(out_dir, f"sku_mappings_{len(catalog)}_s{seed}")
+    with open(f"{stem}.json", "w") as f:
+        json.dump(mappings, f)
+    pd.DataFrame({
+        "sku": list(mappings.keys()),
+        "msku": [m["msku"] for m in mappings.values()],
+        "marketplace": [m["marketplace"] for m in mappings.values()],
+    }).to_csv(f"{stem}.csv", index=False)
+
+    return {"json": f"{stem}.json", "csv": f"{stem}.csv", "count": len(mappings)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic warehouse data")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--out", default="bench_data")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--dirty-rate", type=float, default=DEFAULT_DIRTY_RATE)
+    parser.add_argument("--formats", default="csv", help="Comma-separated: csv,parquet")
+    args = parser.parse_args()
+
+    paths = write_sales(args.rows, args.out, args.seed, args.dirty_rate, tuple(args.formats.split(",")))
+    mappings = write_sku_mappings(paths.pop("catalog"), args.out, args.seed)
+    print(json.dumps({"sales": paths, "mappings": mappings}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Benchmark suite for ingestion, metrics, pagination and SKU mapping.
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 1000,100000 --output results.json
+    BENCH_DATABASE_URL=postgresql://... python benchmarks/run_benchmarks.py --db
+    python benchmarks/run_benchmarks.py --db --storage memory
+
+Database benchmarks TRUNCATE the application tables, so they only run with
+--db against the database named in BENCH_DATABASE_URL (for example the
+docker-compose Postgres), never against DATABASE_URL. With --storage memory
+they run against the in-process storage engine instead.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, os.path.join(ROOT, "gui"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generate_data import DEFAULT_SEED, DEFAULT_DIRTY_RATE, write_sales, write_sku_mappings
+
+DEFAULT_SIZES = "1000,10000,100000"
+DEFAULT_REPEAT = 3
+# Ingestion still writes sales rows one at a time, so cap it separately
+DEFAULT_MAX_INGEST_ROWS = 50_000
+PAGE_SIZE = 100
+
+
+class Suite:
+    """Collects timings in a machine-readable form"""
+
+    def __init__(self, repeat: int):
+        self.repeat = repeat
+        self.results = []
+        # Generated file size the current benchmarks run on; results are
+        # matched across runs by (name, size) since "rows" can depend on state
+        self.size = 0
+
+    def record(self, name: str, rows: int, times, **extra):
+        result = {
+            "name": name,
+            "size": self.size,
+            "rows": rows,
+            "times": times,
+            "min": min(times),
+            "median": statistics.median(times),
+            "mean": statistics.mean(times),
+        }
+        if rows:
+            result["rows_per_second"] = rows / result["median"] if result["median"] else None
+        result.update(extra)
+        self.results.append(result)
+        print(f"{name:<24} rows={rows:<10} median={result['median']:.4f}s min={result['min']:.4f}s")
+        return result
+
+    def time(self, name: str, rows: int, fn, setup=None, **extra):
+        times = []
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - started)
+        return self.record(name, rows, times, **extra)
+
+    async def time_async(self, name: str, rows: int, fn, setup=None, **extra):
+        times = []
+        for _ in range(self.repeat):
+            if setup:
+                await setup()
+            started = time.perf_counter()
+            await fn()
+            times.append(time.perf_counter() - started)
+        return self.record(name, rows, times, **extra)
+
+
+def run_mapping_benchmarks(suite: Suite, rows: int, sales_path: str, mappings_path: str):
+    """Time parsing plus the SKU mapper's auto-map, validation and export steps"""
+    try:
+        from sku_mapper import find_sku_column, auto_map, find_validation_issues, apply_mappings
+    except ImportError as e:
+        print(f"Skipping SKU mapper benchmarks: {e}")
+        return
+
+    suite.time("csv_parse", rows, lambda: pd.read_csv(sales_path))
+    parquet_path = sales_path.replace(".csv", ".parquet")
+    if os.path.exists(parquet_path):
+        suite.time("parquet_parse", rows, lambda: pd.read_parquet(parquet_path))
+
+    df = pd.read_csv(sales_path)
+    skus = list(df[find_sku_column(df)].dropna().unique())
+    with open(mappings_path) as f:
+        base_mappings = json.load(f)
+
+    suite.time("auto_mapping", len(skus), lambda: auto_map(skus, dict(base_mappings)), skus=len(skus))
+    suite.time("validation", rows, lambda: find_validation_issues(df, base_mappings))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "export.csv")
+        suite.time("export", rows, lambda: apply_mappings(df, base_mappings).to_csv(out, index=False))
+
+
+async def run_db_benchmarks(suite: Suite, rows: int, sales_path: str, max_ingest_rows: int):
+    """Time ingestion, metrics and pagination against the benchmark storage"""
+    import main
+
+    storage = main.storage
+
+    async def reset():
+        if main.prisma is None:
+            storage.clear()
+        else:
+            await main.prisma.execute_raw(
+                "TRUNCATE sales_data, order_items, orders, reorder_suggestions, products RESTART IDENTITY CASCADE"
+            )
+        main.product_catalog.invalidate()
+
+    ingest_rows = min(rows, max_ingest_rows)
+    df = pd.read_csv(sales_path, nrows=ingest_rows)
+
+    # First upload into an empty catalog, then the same file again (all products unchanged)
+    await suite.time_async(
+        "ingestion_cold", ingest_rows, lambda: main.process_sales_data(df), setup=reset
+    )
+    await suite.time_async("ingestion_warm", ingest_rows, lambda: main.process_sales_data(df))
+
+    metrics = await storage.get_metrics()
+    await suite.time_async("metrics", metrics["total_sales"], main.compute_metrics)
+
+    product_count = await storage.count_products()
+
+    async def paginate():
+        for skip in range(0, product_count, PAGE_SIZE):
+            await storage.list_products(skip=skip, take=PAGE_SIZE)
+
+    await suite.time_async("pagination", product_count, paginate, page_size=PAGE_SIZE)
+    await suite.time_async("list_all_products", product_count, storage.list_products)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+async def run(args):
+    suite = Suite(args.repeat)
+    sizes = [int(s) for s in args.sizes.split(",")]
+    formats = ("csv", "parquet") if args.parquet else ("csv",)
+
+    if args.db:
+        if args.storage == "memory":
+            os.environ["WMS_STORAGE"] = "memory"
+        else:
+            os.environ["DATABASE_URL"] = os.environ["BENCH_DATABASE_URL"]
+        import main
+        await main.storage.connect()
+
+    try:
+        for rows in sizes:
+            print(f"--- {rows} rows ---")
+            suite.size = rows
+            paths = write_sales(rows, args.data_dir, args.seed, args.dirty_rate, formats, reuse=True)
+            mappings = write_sku_mappings(paths.pop("catalog"), args.data_dir, args.seed)
+
+            run_mapping_benchmarks(suite, rows, paths["csv"], mappings["json"])
+            if args.db:
+                await run_db_benchmarks(suite, rows, paths["csv"], args.max_ingest_rows)
+    finally:
+        if args.db:
+            await main.storage.disconnect()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "dirty_rate": args.dirty_rate,
+            "repeat": args.repeat,
+            "sizes": sizes,
+            "db": args.db,
+            "storage": args.storage if args.db else None,
+        },
+        "results": suite.results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the WMS benchmark suite")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated row counts (up to 10000000)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--dirty-rate", type=float, default=DEFAULT_DIRTY_RATE)
+    parser.add_argument("--data-dir", default=os.path.join(ROOT, "bench_data"))
+    parser.add_argument("--parquet", action="store_true", help="Also generate and time Parquet files (needs pyarrow)")
+    parser.add_argument("--db", action="store_true", help="Run database benchmarks against BENCH_DATABASE_URL")
+    parser.add_argument("--storage", choices=("prisma", "memory"), default="prisma",
+                        help="Storage engine for --db benchmarks")
+    parser.add_argument("--max-ingest-rows", type=int, default=DEFAULT_MAX_INGEST_ROWS)
+    parser.add_argument("--output", default=None, help="Write results JSON here")
+    args = parser.parse_args()
+
+    if args.db and args.storage == "prisma" and not os.getenv("BENCH_DATABASE_URL"):
+        parser.error("--db needs BENCH_DATABASE_URL pointing at a disposable database")
+
+    report = asyncio.run(run(args))
+    output = args.output or os.path.join(
+        ROOT, "bench_results", f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
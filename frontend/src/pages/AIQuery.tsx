@@ -1,6 +1,10 @@
 import React, { useState } from 'react';
 import { submitAIQuery } from '../services/api';
-import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, LineChart, Line } from 'recharts';
+import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer, LineChart, Line, AreaChart, Area } from 'recharts';
+
+const SERIES_COLORS = ['#3B82F6', '#10B981', '#F59E0B', '#EF4444', '#8B5CF6', '#EC4899'];
+// Bars stop being readable long before lines do
+const MAX_BARS = 50;
 
 const AIQuery: React.FC = () => {
   const [query, setQuery] = useState('');
@@ -23,7 +27,9 @@ const AIQuery: React.FC = () => {
       const response = await submitAIQuery({
         query: query.trim(),
         chart_type: chartType,
-        openai_key: openaiKey
+        openai_key: openaiKey,
+        // Roughly one point per horizontal pixel is all the chart can show
+        max_points: chartType === 'bar' ? MAX_BARS : Math.min(window.innerWidth, 2000)
       });
       setResult(response);
     } catch (err: any) {
@@ -37,10 +43,14 @@ const AIQuery: React.FC = () => {
     if (!result?.chart_data) return null;
 
     const { chart_data } = result;
-    const data = chart_data.labels.map((label: string, index: number) => ({
-      name: label,
-      value: chart_data.datasets[0].data[index]
-    }));
+    const data = chart_data.labels.map((label: string, index: number) => {
+      const point: any = { name: label };
+      chart_data.datasets.forEach((dataset: any) => {
+        point[dataset.label] = dataset.data[index];
+      });
+      return point;
+    });
+    const showLegend = chart_data.datasets.length > 1;
 
     if (chart_data.type === 'bar') {
       return (
@@ -50,7 +60,10 @@ const AIQuery: React.FC = () => {
             <XAxis dataKey="name" />
             <YAxis />
             <Tooltip />
-            <Bar dataKey="value" fill="#3B82F6" />
+            {showLegend && <Legend />}
+            {chart_data.datasets.map((dataset: any, index: number) => (
+              <Bar key={dataset.label} dataKey={dataset.label} fill={SERIES_COLORS[index % SERIES_COLORS.length]} />
+            ))}
           </BarChart>
         </ResponsiveContainer>
       );
@@ -64,12 +77,47 @@ const AIQuery: React.FC = () => {
             <XAxis dataKey="name" />
             <YAxis />
             <Tooltip />
-            <Line type="monotone" dataKey="value" stroke="#3B82F6" />
+            {showLegend && <Legend />}
+            {chart_data.datasets.map((dataset: any, index: number) => (
+              <Line
+                key={dataset.label}
+                type="monotone"
+                dataKey={dataset.label}
+                stroke={SERIES_COLORS[index % SERIES_COLORS.length]}
+                dot={false}
+                isAnimationActive={false}
+              />
+            ))}
           </LineChart>
         </ResponsiveContainer>
       );
     }
 
+    if (chart_data.type === 'area') {
+      return (
+        <ResponsiveContainer width="100%" height={400}>
+          <AreaChart data={data}>
+            <CartesianGrid strokeDasharray="3 3" />
+            <XAxis dataKey="name" />
+            <YAxis />
+            <Tooltip />
+            {showLegend && <Legend />}
+            {chart_data.datasets.map((dataset: any, index: number) => (
+              <Area
+                key={dataset.label}
+                type="monotone"
+                dataKey={dataset.label}
+                stroke={SERIES_COLORS[index % SERIES_COLORS.length]}
+                fill={SERIES_COLORS[index % SERIES_COLORS.length]}
+                fillOpacity={0.2}
+                isAnimationActive={false}
+              />
+            ))}
+          </AreaChart>
+        </ResponsiveContainer>
+      );
+    }
+
     return null;
   };
 
@@ -146,6 +194,7 @@ const AIQuery: React.FC = () => {
               >
                 <option value="bar">Bar Chart</option>
                 <option value="line">Line Chart</option>
+                <option value="area">Area Chart</option>
                 <option value="none">No Chart</option>
               </select>
             </div>
@@ -206,6 +255,11 @@ const AIQuery: React.FC = () => {
             <div className="bg-white p-6 rounded-lg shadow">
               <h3 className="text-lg font-medium text-gray-900 mb-4">Visualization</h3>
               {renderChart()}
+              {result.chart_data.downsampled && (
+                <p className="mt-2 text-xs text-gray-500">
+                  Showing {result.chart_data.returned_points.toLocaleString()} of {result.chart_data.total_points.toLocaleString()} points
+                </p>
+              )}
             </div>
           )}
 
@@ -1,5 +1,5 @@
-import React from 'react';
-import { useQuery } from 'react-query';
+import React, { useEffect, useState } from 'react';
+import { useQuery, useQueryClient } from 'react-query';
 import { 
   CurrencyDollarIcon, 
   CubeIcon, 
@@ -7,10 +7,39 @@ import {
   ChartBarIcon 
 } from '@heroicons/react/24/outline';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts';
-import { getMetrics } from '../services/api';
+import { getMetrics, getReorderSuggestions, runForecast, subscribeToMetrics } from '../services/api';
+
+// The forecast runs as a background job; check for its results after this delay
+const FORECAST_REFRESH_MS = 10000;
 
 const Dashboard: React.FC = () => {
-  const { data: metrics, isLoading, error } = useQuery('metrics', getMetrics);
+  const queryClient = useQueryClient();
+  // The server pushes updates, so the initial fetch never goes stale
+  const { data: metrics, isLoading, error } = useQuery('metrics', getMetrics, {
+    staleTime: Infinity,
+    refetchOnWindowFocus: false,
+  });
+
+  useEffect(() => {
+    return subscribeToMetrics((update) => queryClient.setQueryData('metrics', update));
+  }, [queryClient]);
+  const { data: reorderSuggestions } = useQuery('reorderSuggestions', () => getReorderSuggestions(10));
+  const [forecastStatus, setForecastStatus] = useState<'idle' | 'running' | 'started' | 'error'>('idle');
+  const [forecastMessage, setForecastMessage] = useState('');
+
+  const handleRunForecast = async () => {
+    setForecastStatus('running');
+    setForecastMessage('');
+    try {
+      await runForecast();
+      setForecastStatus('started');
+      setForecastMessage('Forecast started. Suggestions will update when it finishes.');
+      setTimeout(() => queryClient.invalidateQueries('reorderSuggestions'), FORECAST_REFRESH_MS);
+    } catch (err: any) {
+      setForecastStatus('error');
+      setForecastMessage(err.response?.data?.detail || 'Failed to start forecast');
+    }
+  };
 
   if (isLoading) {
     return (
@@ -178,6 +207,49 @@ const Dashboard: React.FC = () => {
         </div>
       </div>
 
+      {/* Reorder Suggestions */}
+      <div className="bg-white p-6 rounded-lg shadow">
+        <div className="flex items-center justify-between mb-4">
+          <h3 className="text-lg font-medium text-gray-900">Reorder Suggestions</h3>
+          <button
+            onClick={handleRunForecast}
+            disabled={forecastStatus === 'running'}
+            className="bg-indigo-600 text-white px-4 py-2 rounded-md hover:bg-indigo-700 transition-colors disabled:opacity-50"
+          >
+            {forecastStatus === 'running' ? 'Starting...' : 'Run Forecast'}
+          </button>
+        </div>
+        {forecastMessage && (
+          <p className={`mb-4 text-sm ${forecastStatus === 'error' ? 'text-red-600' : 'text-green-600'}`}>
+            {forecastMessage}
+          </p>
+        )}
+        {reorderSuggestions && reorderSuggestions.length > 0 ? (
+          <table className="min-w-full divide-y divide-gray-200">
+            <thead>
+              <tr>
+                <th className="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase">SKU</th>
+                <th className="px-4 py-2 text-right text-xs font-medium text-gray-500 uppercase">On Hand</th>
+                <th className="px-4 py-2 text-right text-xs font-medium text-gray-500 uppercase">Reorder Point</th>
+                <th className="px-4 py-2 text-right text-xs font-medium text-gray-500 uppercase">Suggested Qty</th>
+              </tr>
+            </thead>
+            <tbody className="divide-y divide-gray-200">
+              {reorderSuggestions.map((suggestion) => (
+                <tr key={suggestion.id}>
+                  <td className="px-4 py-2 text-sm text-gray-900">{suggestion.product?.sku || suggestion.product_id}</td>
+                  <td className="px-4 py-2 text-sm text-gray-500 text-right">{suggestion.on_hand}</td>
+                  <td className="px-4 py-2 text-sm text-gray-500 text-right">{Math.ceil(suggestion.reorder_point)}</td>
+                  <td className="px-4 py-2 text-sm font-medium text-gray-900 text-right">{suggestion.suggested_order_qty}</td>
+                </tr>
+              ))}
+            </tbody>
+          </table>
+        ) : (
+          <p className="text-sm text-gray-500">No reorder suggestions yet. Click Run Forecast to generate them.</p>
+        )}
+      </div>
+
       {/* Quick Actions */}
       <div className="bg-white p-6 rounded-lg shadow">
         <h3 className="text-lg font-medium text-gray-900 mb-4">Quick Actions</h3>
@@ -1,12 +1,13 @@
 import React, { useState, useCallback } from 'react';
 import { useDropzone } from 'react-dropzone';
 import { CloudArrowUpIcon, DocumentIcon, CheckIcon } from '@heroicons/react/24/outline';
-import { uploadSalesData } from '../services/api';
+import { uploadSalesData, uploadOrders } from '../services/api';
 
 const DataUpload: React.FC = () => {
   const [uploadStatus, setUploadStatus] = useState<'idle' | 'uploading' | 'success' | 'error'>('idle');
   const [uploadResult, setUploadResult] = useState<any>(null);
   const [errorMessage, setErrorMessage] = useState<string>('');
+  const [fileType, setFileType] = useState<'sales' | 'orders'>('sales');
 
   const onDrop = useCallback(async (acceptedFiles: File[]) => {
     if (acceptedFiles.length === 0) return;
@@ -16,14 +17,14 @@ const DataUpload: React.FC = () => {
     setErrorMessage('');
 
     try {
-      const result = await uploadSalesData(file);
+      const result = fileType === 'orders' ? await uploadOrders(file) : await uploadSalesData(file);
       setUploadResult(result);
       setUploadStatus('success');
     } catch (error: any) {
       setErrorMessage(error.response?.data?.detail || 'Upload failed');
       setUploadStatus('error');
     }
-  }, []);
+  }, [fileType]);
 
   const { getRootProps, getInputProps, isDragActive } = useDropzone({
     onDrop,
@@ -44,6 +45,20 @@ const DataUpload: React.FC = () => {
 
       {/* Upload Area */}
       <div className="bg-white p-8 rounded-lg shadow">
+        <div className="mb-4">
+          <label htmlFor="fileType" className="block text-sm font-medium text-gray-700">
+            File Type
+          </label>
+          <select
+            id="fileType"
+            value={fileType}
+            onChange={(e) => setFileType(e.target.value as 'sales' | 'orders')}
+            className="mt-1 block w-64 rounded-md border-gray-300 shadow-sm focus:border-indigo-500 focus:ring-indigo-500 sm:text-sm"
+          >
+            <option value="sales">Sales data</option>
+            <option value="orders">Marketplace order export</option>
+          </select>
+        </div>
         <div
           {...getRootProps()}
           className={`border-2 border-dashed rounded-lg p-12 text-center cursor-pointer transition-colors ${
@@ -95,6 +110,22 @@ const DataUpload: React.FC = () => {
                       <span className="text-gray-500">Rows processed:</span>
                       <span className="ml-2 font-medium">{uploadResult.rows_processed}</span>
                     </div>
+                    {uploadResult.orders_created !== undefined && (
+                      <>
+                        <div>
+                          <span className="text-gray-500">Orders created:</span>
+                          <span className="ml-2 font-medium">{uploadResult.orders_created}</span>
+                        </div>
+                        <div>
+                          <span className="text-gray-500">Duplicate orders skipped:</span>
+                          <span className="ml-2 font-medium">{uploadResult.duplicate_orders}</span>
+                        </div>
+                        <div>
+                          <span className="text-gray-500">Rows rejected:</span>
+                          <span className="ml-2 font-medium">{uploadResult.rejected_rows}</span>
+                        </div>
+                      </>
+                    )}
                     <div>
                       <span className="text-gray-500">Status:</span>
                       <span className="ml-2 font-medium text-green-600">Success</span>
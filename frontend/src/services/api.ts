@@ -30,10 +30,30 @@ export interface Product {
   cost?: number;
 }
 
+export interface ReorderSuggestion {
+  id: string;
+  product_id: string;
+  horizon_days: number;
+  lead_time_days: number;
+  method: string;
+  avg_daily_demand: number;
+  forecast_demand: number;
+  demand_std: number;
+  safety_stock: number;
+  reorder_point: number;
+  on_hand: number;
+  suggested_order_qty: number;
+  computed_at: string;
+  product?: Product;
+}
+
 export interface AIQueryRequest {
   query: string;
   chart_type?: string;
   openai_key?: string;
+  max_points?: number;
+  label_column?: string;
+  value_columns?: string[];
 }
 
 export interface AIQueryResponse {
@@ -49,6 +69,42 @@ export const getMetrics = async (): Promise<Metrics> => {
   return response.data;
 };
 
+// Subscribe to pushed metric updates; returns a function that closes the stream
+export const subscribeToMetrics = (onUpdate: (metrics: Metrics) => void): (() => void) => {
+  let source: EventSource;
+  let current: Metrics | null = null;
+  let version = 0;
+
+  const connect = () => {
+    source = new EventSource(`${API_BASE_URL}/api/metrics/stream`);
+
+    source.addEventListener('snapshot', (event) => {
+      const message = JSON.parse((event as MessageEvent).data);
+      current = message.data;
+      version = message.version;
+      onUpdate(message.data);
+    });
+
+    source.addEventListener('diff', (event) => {
+      const message = JSON.parse((event as MessageEvent).data);
+      if (!current || message.base_version !== version) {
+        // Missed an update; a new connection starts with a fresh snapshot
+        source.close();
+        connect();
+        return;
+      }
+      const next: any = { ...current, ...message.changes };
+      message.removed.forEach((key: string) => delete next[key]);
+      current = next;
+      version = message.version;
+      onUpdate(next);
+    });
+  };
+
+  connect();
+  return () => source.close();
+};
+
 export const getProducts = async (): Promise<Product[]> => {
   const response = await api.get('/api/products');
   return response.data.products;
@@ -71,6 +127,18 @@ export const uploadSalesData = async (file: File): Promise<any> => {
   return response.data;
 };
 
+export const uploadOrders = async (file: File): Promise<any> => {
+  const formData = new FormData();
+  formData.append('file', file);
+
+  const response = await api.post('/api/orders/upload', formData, {
+    headers: {
+      'Content-Type': 'multipart/form-data',
+    },
+  });
+  return response.data;
+};
+
 export const getSKUMappings = async (): Promise<any[]> => {
   const response = await api.get('/api/sku-mappings');
   return response.data.mappings;
@@ -85,6 +153,20 @@ export const createSKUMapping = async (sku: string, msku: string, marketplace?:
   return response.data.mapping;
 };
 
+export const getReorderSuggestions = async (limit = 100, onlyReorder = true): Promise<ReorderSuggestion[]> => {
+  const response = await api.get('/api/reorder-suggestions', {
+    params: { limit, only_reorder: onlyReorder },
+  });
+  return response.data.suggestions;
+};
+
+export const runForecast = async (horizonDays = 30): Promise<any> => {
+  const response = await api.post('/api/forecast/run', null, {
+    params: { horizon_days: horizonDays },
+  });
+  return response.data;
+};
+
 export const submitAIQuery = async (query: AIQueryRequest): Promise<AIQueryResponse> => {
   const response = await api.post('/api/query', query);
   return response.data;
@@ -7,6 +7,78 @@ import logging
 from datetime import datetime
 import re
 
+def find_sku_column(df):
+    """Return the first column that looks like a SKU column, or None"""
+    sku_columns = [col for col in df.columns 
+                  if 'sku' in col.lower() or 'product' in col.lower()]
+    return sku_columns[0] if sku_columns else None
+
+def create_msku_from_sku(sku):
+    """Create MSKU from SKU using pattern matching"""
+    # Remove common prefixes/suffixes
+    cleaned_sku = re.sub(r'^(AMZ|EBAY|SHOP|WC)_', '', sku)
+    cleaned_sku = re.sub(r'_[0-9]+$', '', cleaned_sku)
+    
+    # Convert to uppercase and remove special characters
+    msku = re.sub(r'[^A-Z0-9]', '', cleaned_sku.upper())
+    
+    return msku if msku else f"MSKU_{sku}"
+
+def auto_map(skus, mappings):
+    """Add an auto-generated mapping for every SKU that has none"""
+    for sku in skus:
+        if sku not in mappings:
+            # Try to create MSKU from SKU
+            mappings[sku] = {
+                'msku': create_msku_from_sku(sku),
+                'marketplace': 'Auto-mapped'
+            }
+    return mappings
+
+def find_validation_issues(sales_data, mappings):
+    """Return a list of problems with the data and mappings"""
+    issues = []
+    
+    # Check for unmapped SKUs
+    sku_column = find_sku_column(sales_data)
+    if sku_column:
+        unique_skus = sales_data[sku_column].dropna().unique()
+        unmapped_skus = [sku for sku in unique_skus if str(sku) not in mappings]
+        
+        if unmapped_skus:
+            issues.append(f"Unmapped SKUs: {len(unmapped_skus)}")
+            
+    # Check for duplicate MSKUs
+    msku_counts = {}
+    for mapping in mappings.values():
+        msku = mapping.get('msku', '')
+        if msku:
+            msku_counts[msku] = msku_counts.get(msku, 0) + 1
+            
+    duplicate_mskus = [msku for msku, count in msku_counts.items() if count > 1]
+    if duplicate_mskus:
+        issues.append(f"Duplicate MSKUs: {len(duplicate_mskus)}")
+        
+    return issues
+
+def apply_mappings(sales_data, mappings):
+    """Return a copy of the data with MSKU and Marketplace columns added"""
+    cleaned_data = sales_data.copy()
+    
+    sku_column = find_sku_column(cleaned_data)
+    if sku_column:
+        # Add MSKU column
+        cleaned_data['MSKU'] = cleaned_data[sku_column].map(
+            lambda x: mappings.get(str(x), {}).get('msku', '') if pd.notna(x) else ''
+        )
+        
+        # Add marketplace column
+        cleaned_data['Marketplace'] = cleaned_data[sku_column].map(
+            lambda x: mappings.get(str(x), {}).get('marketplace', '') if pd.notna(x) else ''
+        )
+        
+    return cleaned_data
+
 class SKUMapper:
     def __init__(self):
         self.root = tk.Tk()
@@ -260,14 +332,7 @@ class SKUMapper:
         all_skus = list(self.sku_listbox.get(0, tk.END))
         
         # Simple auto-mapping logic
-        for sku in all_skus:
-            if sku not in self.mappings:
-                # Try to create MSKU from SKU
-                msku = self.create_msku_from_sku(sku)
-                self.mappings[sku] = {
-                    'msku': msku,
-                    'marketplace': 'Auto-mapped'
-                }
+        auto_map(all_skus, self.mappings)
                 
         # Update preview
         self.update_preview()
@@ -277,14 +342,7 @@ class SKUMapper:
         
     def create_msku_from_sku(self, sku):
         """Create MSKU from SKU using pattern matching"""
-        # Remove common prefixes/suffixes
-        cleaned_sku = re.sub(r'^(AMZ|EBAY|SHOP|WC)_', '', sku)
-        cleaned_sku = re.sub(r'_[0-9]+$', '', cleaned_sku)
-        
-        # Convert to uppercase and remove special characters
-        msku = re.sub(r'[^A-Z0-9]', '', cleaned_sku.upper())
-        
-        return msku if msku else f"MSKU_{sku}"
+        return create_msku_from_sku(sku)
         
     def on_sku_select(self, event):
         """Handle SKU selection"""
@@ -383,25 +441,7 @@ class SKUMapper:
         if file_path:
             try:
                 # Create cleaned data
-                cleaned_data = self.sales_data.copy()
-                
-                # Find SKU column
-                sku_columns = [col for col in cleaned_data.columns 
-                              if 'sku' in col.lower() or 'product' in col.lower()]
-                
-                if sku_columns:
-                    sku_column = sku_columns[0]
-                    
-                    # Add MSKU column
-                    cleaned_data['MSKU'] = cleaned_data[sku_column].map(
-                        lambda x: self.mappings.get(str(x), {}).get('msku', '') if pd.notna(x) else ''
-                    )
-                    
-                    # Add marketplace column
-                    cleaned_data['Marketplace'] = cleaned_data[sku_column].map(
-                        lambda x: self.mappings.get(str(x), {}).get('marketplace', '') if pd.notna(x) else ''
-                    )
-                    
+                cleaned_data = apply_mappings(self.sales_data, self.mappings)
                 cleaned_data.to_csv(file_path, index=False)
                 
                 logging.info(f"Exported cleaned data to {file_path}")
@@ -470,30 +510,7 @@ class SKUMapper:
             messagebox.showwarning("Warning", "No data loaded")
             return
             
-        issues = []
-        
-        # Check for unmapped SKUs
-        sku_columns = [col for col in self.sales_data.columns 
-                      if 'sku' in col.lower() or 'product' in col.lower()]
-        
-        if sku_columns:
-            sku_column = sku_columns[0]
-            unique_skus = self.sales_data[sku_column].dropna().unique()
-            unmapped_skus = [sku for sku in unique_skus if str(sku) not in self.mappings]
-            
-            if unmapped_skus:
-                issues.append(f"Unmapped SKUs: {len(unmapped_skus)}")
-                
-        # Check for duplicate MSKUs
-        msku_counts = {}
-        for mapping in self.mappings.values():
-            msku = mapping.get('msku', '')
-            if msku:
-                msku_counts[msku] = msku_counts.get(msku, 0) + 1
-                
-        duplicate_mskus = [msku for msku, count in msku_counts.items() if count > 1]
-        if duplicate_mskus:
-            issues.append(f"Duplicate MSKUs: {len(duplicate_mskus)}")
+        issues = find_validation_issues(self.sales_data, self.mappings)
             
         if issues:
             message = "Validation Issues Found:\n" + "\n".join(issues)